@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# Фоновый перенос старых задач в архив, если он включён в настройках
+from journal.archive import start_archive_scheduler  # noqa: E402
+
+start_archive_scheduler()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -39,11 +40,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'journal.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'journal.auth.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -68,26 +70,17 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
-import logging
-
-
-# Цвета для терминала
-class ColorFormatter(logging.Formatter):
-    COLORS = {
-        'DEBUG': '\033[94m',  # Синий
-        'INFO': '\033[92m',  # Зелёный
-        'WARNING': '\033[93m',  # Жёлтый
-        'ERROR': '\033[91m',  # Красный
-        'CRITICAL': '\033[95m',  # Фиолетовый
-    }
-    RESET = '\033[0m'
-
-    def format(self, record):
-        log_color = self.COLORS.get(record.levelname, self.RESET)
-        record.asctime = self.formatTime(record, "%Y-%m-%d %H:%M:%S")
-        message = super().format(record)
-        return f"{log_color}{message}{self.RESET}"
+# Логирование (journal.log): записи уходят в очередь, форматирует и пишет их
+# фоновый поток. DJANGO_LOG_LEVEL — уровень корневого логгера,
+# DJANGO_LOG_LEVELS=journal=DEBUG,django.db.backends=DEBUG — отдельных логгеров,
+# DJANGO_LOG_FORMAT=json — строка JSON на запись (по умолчанию цветной текст),
+# DJANGO_LOG_SAMPLING=journal.views=0.01 — доля записей ниже WARNING у горячих логгеров
+from journal.log import parse_pairs  # noqa: E402
 
+LOG_LEVEL = os.environ.get('DJANGO_LOG_LEVEL', 'INFO')
+LOG_LEVELS = parse_pairs(os.environ.get('DJANGO_LOG_LEVELS'))
+LOG_FORMAT = os.environ.get('DJANGO_LOG_FORMAT', 'colored')
+LOG_SAMPLING = parse_pairs(os.environ.get('DJANGO_LOG_SAMPLING'), float)
 
 LOGGING = {
     'version': 1,
@@ -95,43 +88,142 @@ LOGGING = {
 
     'formatters': {
         'colored': {
-            '()': ColorFormatter,
+            '()': 'journal.log.ColorFormatter',
             'format': '[{levelname}] {asctime} {name}: {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'journal.log.JsonFormatter',
+        },
+    },
+
+    'filters': {
+        'sampling': {
+            '()': 'journal.log.SamplingFilter',
+            'rates': LOG_SAMPLING,
+        },
     },
 
     'handlers': {
+        # Пишет только из потока QueueListener, к логгерам напрямую не подключается
         'console': {
             'class': 'logging.StreamHandler',
-            'formatter': 'colored',
+            'formatter': LOG_FORMAT,
+        },
+        'queue': {
+            '()': 'journal.log.QueueListenerHandler',
+            'handlers': ['cfg://handlers.console'],
+            'filters': ['sampling'],
         },
     },
 
     'root': {
-        'handlers': ['console'],
-        'level': 'DEBUG',
+        'handlers': ['queue'],
+        'level': LOG_LEVEL,
     },
 
     'loggers': {
         'django': {
-            'handlers': ['console'],
-            'level': 'INFO',
+            'handlers': ['queue'],
+            'level': LOG_LEVELS.pop('django', 'INFO'),
             'propagate': False,
         },
+        **{name: {'level': level} for name, level in LOG_LEVELS.items()},
     },
 }
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Прагмы SQLite выполняются при каждом новом соединении. WAL пускает читателей
+# параллельно с писателем, synchronous=NORMAL в WAL не делает fsync на каждый
+# коммит. busy_timeout (мс) — сколько писатель ждёт блокировку, а не падает
+# с «database is locked»; cache_size в КиБ (минус), mmap_size в байтах
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+            # Транзакция сразу берёт блокировку записи: иначе чтение внутри atomic()
+            # и последующая запись упираются в SQLITE_BUSY без ожидания busy_timeout
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # Постоянные соединения: прагмы и прогретый кэш страниц живут между запросами
+        'CONN_MAX_AGE': int(os.environ.get('DJANGO_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'planner',
+    }
+}
+
+# Сессии: cached_db читает сессию из кэша и идёт в БД только при промахе,
+# signed_cookies хранит её в подписанной cookie и в БД не ходит совсем
+# (но выход не отзывает уже выданную cookie). DJANGO_SESSION_ENGINE=
+# django.contrib.sessions.backends.db возвращает сессии только в БД
+SESSION_ENGINE = os.environ.get('DJANGO_SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db')
+
+# Кэш пользователя запроса (journal.auth): алиас и время жизни в секундах,
+# 0 — выключен. Права из групп не кэшируются
+JOURNAL_USER_CACHE = 'default'
+JOURNAL_USER_CACHE_TIMEOUT = 60
+
+# Алиас кэша и время жизни снимков недели (journal.cache)
+JOURNAL_WEEK_CACHE = 'default'
+JOURNAL_WEEK_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Время жизни счётчиков закрытых месяцев и лет карты активности (в кэше недель)
+JOURNAL_HEATMAP_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+# Кэш фрагментов week.html (карточки дней и панель недельных задач).
+# Чтобы отключить, укажите алиас с DummyCache
+JOURNAL_FRAGMENT_CACHE = 'default'
+JOURNAL_FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Перенос выполненных задач в архив (journal.archive, команда archive_tasks).
+# JOURNAL_ARCHIVE_INTERVAL — период фонового переноса в секундах, None — выключен
+JOURNAL_ARCHIVE_AFTER_WEEKS = 52
+JOURNAL_ARCHIVE_BATCH_SIZE = 500
+JOURNAL_ARCHIVE_INTERVAL = None
+
+# iCalendar-лента задач (journal.feeds): сколько дней прошлого в неё попадает, None — все
+JOURNAL_CALENDAR_PAST_DAYS = 180
+
+# Async-версии API задач (journal.async_views) для запуска под ASGI,
+# включаются переменной окружения JOURNAL_ASYNC_VIEWS=1. Под WSGI не нужны.
+# Сравнение режимов — команда benchmark_concurrency
+JOURNAL_ASYNC_VIEWS = os.environ.get('JOURNAL_ASYNC_VIEWS') == '1'
+
+# Поток изменений задач по SSE (journal.events, только под ASGI): брокер,
+# размер очереди подписчика и период heartbeat в секундах
+JOURNAL_EVENT_BROKER = 'journal.events.InProcessBroker'
+JOURNAL_EVENTS_QUEUE_SIZE = 100
+JOURNAL_EVENTS_HEARTBEAT = 15
+
+# Профилирование запросов (journal.profiling): доля запросов, для которых
+# считаются SQL, рендер шаблона и общее время (0 — выключено, 1 — все).
+# Итоги — в заголовке Server-Timing и на /metrics; сборщику метрик
+# доступ по заголовку Authorization: Bearer <JOURNAL_METRICS_TOKEN>
+JOURNAL_PROFILING_SAMPLE_RATE = float(os.environ.get('JOURNAL_PROFILING_SAMPLE_RATE', '0'))
+JOURNAL_METRICS_TOKEN = os.environ.get('JOURNAL_METRICS_TOKEN')
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_wsgi_application()
+
+# Фоновый перенос старых задач в архив, если он включён в настройках
+from journal.archive import start_archive_scheduler  # noqa: E402
+
+start_archive_scheduler()
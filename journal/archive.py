@@ -0,0 +1,139 @@
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .cache import invalidate_weeks
+from .events import RESYNC, publish_event
+from .models import Task, TaskArchive
+from .stats import apply_bulk_stats_delta, bump_change_seq
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_WEEKS = 52
+ARCHIVE_BATCH_SIZE = 500
+ARCHIVED_FIELDS = [
+    'id', 'user_id', 'title', 'description', 'is_done', 'created_at', 'updated_at',
+    'date', 'is_weekly', 'week_start',
+]
+
+
+def archive_cutoff(weeks):
+    return timezone.now().date() - timedelta(weeks=weeks)
+
+
+def archive_batch(cutoff, after_id, batch_size):
+    """
+    Переносит одну порцию выполненных задач старше cutoff в TaskArchive.
+    Порция — отдельная короткая транзакция: копия и удаление либо вместе
+    применяются, либо вместе откатываются, поэтому прерванный перенос
+    можно просто запустить заново. Удаление идёт без сигналов post_delete:
+    счётчики, номер изменений и кэш недель обновляются одним разом на
+    пользователя, как в import_batch. Возвращает (перенесено, последний id).
+    """
+    with transaction.atomic():
+        tasks = list(
+            Task.objects.filter(is_done=True, date__lt=cutoff, id__gt=after_id)
+            .order_by('id')[:batch_size]
+        )
+        if not tasks:
+            return 0, after_id
+
+        TaskArchive.objects.bulk_create(
+            [TaskArchive(**{field: getattr(task, field) for field in ARCHIVED_FIELDS}) for task in tasks],
+            ignore_conflicts=True,
+        )
+        ids = [task.id for task in tasks]
+        # То, что ORM сделал бы по on_delete=SET_NULL, — без сборщика удаления
+        Task.objects.filter(carried_from_id__in=ids).update(carried_from=None)
+        Task.objects.filter(id__in=ids)._raw_delete(Task.objects.db)
+
+        by_user = defaultdict(list)
+        for task in tasks:
+            by_user[task.user_id].append(task)
+        for user_id, user_tasks in by_user.items():
+            dates = Counter(task.date for task in user_tasks if not task.is_weekly)
+            if dates:
+                # В архив попадают только выполненные: total и done уменьшаются вместе
+                apply_bulk_stats_delta(user_id, {date: (-count, -count) for date, count in dates.items()})
+            invalidate_weeks(
+                user_id,
+                dates=dates.keys(),
+                weekly_dates={task.date for task in user_tasks if task.is_weekly},
+            )
+            # Вместо task.deleted на каждую давнюю задачу — одно событие: клиент перечитает неделю
+            publish_event(user_id, RESYNC, seq=bump_change_seq(user_id, len(user_tasks)))
+
+    return len(tasks), tasks[-1].id
+
+
+def archive_done_tasks(weeks=None, batch_size=None, max_batches=None, pause=0, on_batch=None):
+    """
+    Переносит выполненные задачи порциями по возрастанию id. Каждая следующая
+    порция продолжает с последнего id, так что таблица просматривается один раз.
+    """
+    # weeks=0 — переносить всё выполненное до сегодняшнего дня, а не значение по умолчанию
+    if weeks is None:
+        weeks = getattr(settings, 'JOURNAL_ARCHIVE_AFTER_WEEKS', ARCHIVE_AFTER_WEEKS)
+    batch_size = batch_size or getattr(settings, 'JOURNAL_ARCHIVE_BATCH_SIZE', ARCHIVE_BATCH_SIZE)
+    cutoff = archive_cutoff(weeks)
+
+    total, last_id, batches = 0, 0, 0
+    while max_batches is None or batches < max_batches:
+        moved, last_id = archive_batch(cutoff, last_id, batch_size)
+        if not moved:
+            break
+        total += moved
+        batches += 1
+        if on_batch:
+            on_batch(batches, moved, last_id)
+        # Пауза между порциями даёт пройти запросам, ждущим блокировку SQLite
+        if pause:
+            time.sleep(pause)
+
+    return total
+
+
+class ArchiveScheduler(threading.Thread):
+    """Фоновый перенос в архив внутри процесса приложения раз в interval секунд."""
+
+    def __init__(self, interval):
+        super().__init__(name='journal-archive', daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                moved = archive_done_tasks()
+                if moved:
+                    logger.info('Перенесено в архив задач: %d', moved)
+            except Exception:
+                logger.exception('Ошибка переноса задач в архив')
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self.stopped.set()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_archive_scheduler():
+    """Запускает фоновый перенос, если задан JOURNAL_ARCHIVE_INTERVAL (в секундах)."""
+    global _scheduler
+    interval = getattr(settings, 'JOURNAL_ARCHIVE_INTERVAL', None)
+    if not interval:
+        return None
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = ArchiveScheduler(interval)
+            _scheduler.start()
+    return _scheduler
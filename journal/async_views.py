@@ -0,0 +1,234 @@
+"""
+Async-версии API задач для ASGI (JOURNAL_ASYNC_VIEWS). Ответы совпадают с
+journal.views; пользователь берётся через request.auser(), выборки и запись —
+через async ORM. Сами запросы к БД Django по-прежнему выполняет в потоке
+sync_to_async, поэтому выигрыш зависит от нагрузки — см. benchmark_concurrency.
+Здесь же поток событий SSE: он держит соединение открытым и должен быть async.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+from django.utils.http import quote_etag
+from django.views.decorators.cache import cache_control
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from .events import EVENTS_HEARTBEAT, RESYNC, format_event, get_broker
+from .models import Task
+from .serializers import FastJsonResponse, parse_fields, serialize_task, serialize_week, task_rows
+from .services import (
+    TaskConflict, aget_week, get_week_range, parse_if_match, task_etag, toggle_task, update_task_fields, week_etag
+)
+from .stats import aget_change_seq, aget_day_stats
+
+
+@require_GET
+@cache_control(private=True, no_cache=True)
+async def get_week_tasks(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+        start_date, _ = get_week_range(int(request.GET.get('week_offset', 0)))
+        week = await aget_week(user, start_date)
+
+        # @condition вызывает etag_func синхронно, поэтому проверяем ETag здесь
+        etag = quote_etag(week_etag(user, week))
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = FastJsonResponse(serialize_week(week, fields))
+        response.headers.setdefault('ETag', etag)
+        return response
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@csrf_exempt
+@require_POST
+async def create_task(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        data = json.loads(request.body)
+
+        if not data.get('title'):
+            return JsonResponse({'error': 'Название задачи обязательно'}, status=400)
+
+        if not data.get('date'):
+            return JsonResponse({'error': 'Дата задачи обязательна'}, status=400)
+
+        date = parse_date(str(data['date']))
+        if date is None:
+            return JsonResponse({'error': 'Неверный формат даты'}, status=400)
+
+        task = await Task.objects.acreate(
+            user=user,
+            title=data['title'],
+            description=data.get('description', ''),
+            date=date,
+            is_done=data.get('is_done', False),
+            is_weekly=data.get('is_weekly', False),
+        )
+
+        response = {
+            'task': serialize_task(task),
+            'new_task_id': task.id,
+            'change_seq': task.change_seq,
+            'day_stats': await aget_day_stats(user.pk, task.date),
+        }
+
+        if request.GET.get('include') == 'day':
+            tasks = Task.objects.filter(date=task.date, user=user)
+            response['tasks'] = await sync_to_async(task_rows)(tasks, parse_fields(request.GET.get('fields')))
+
+        return FastJsonResponse(response, status=201)
+
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Неверный JSON'}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+async def _task_written_response(user, task):
+    return JsonResponse({
+        **serialize_task(task),
+        'day_stats': await aget_day_stats(user.pk, task.date),
+        'change_seq': task.change_seq
+    }, headers={'ETag': task_etag(task)})
+
+
+def _task_conflict_response(conflict):
+    return JsonResponse(
+        {'error': str(conflict), 'task': serialize_task(conflict.task)},
+        status=409, headers={'ETag': task_etag(conflict.task)}
+    )
+
+
+@csrf_exempt
+async def get_task(request, task_id):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        fields = parse_fields(request.GET.get('fields'))
+        task = await Task.objects.aget(id=task_id, user=user)
+        return JsonResponse(serialize_task(task, fields), headers={'ETag': task_etag(task)})
+    except Task.DoesNotExist:
+        return JsonResponse({'error': 'Задача не найдена'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@csrf_exempt
+@require_POST
+async def update_task(request, task_id):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        data = json.loads(request.body)
+        # Условный UPDATE и учёт изменения — одна транзакция, поэтому целиком в sync-коде
+        task = await sync_to_async(update_task_fields)(
+            user, task_id, data, parse_if_match(request.headers.get('If-Match'))
+        )
+        return await _task_written_response(user, task)
+
+    except Task.DoesNotExist:
+        return JsonResponse({'error': 'Задача не найдена'}, status=404)
+    except TaskConflict as e:
+        return _task_conflict_response(e)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@csrf_exempt
+@require_POST
+async def toggle_task_view(request, task_id):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        task = await sync_to_async(toggle_task)(user, task_id, parse_if_match(request.headers.get('If-Match')))
+        return await _task_written_response(user, task)
+
+    except Task.DoesNotExist:
+        return JsonResponse({'error': 'Задача не найдена'}, status=404)
+    except TaskConflict as e:
+        return _task_conflict_response(e)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@csrf_exempt
+@require_POST
+async def delete_task(request, task_id):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        task = await Task.objects.aget(id=task_id, user=user)
+        await task.adelete()
+        return JsonResponse({
+            'status': 'deleted',
+            'day_stats': await aget_day_stats(user.pk, task.date),
+            'change_seq': task.change_seq
+        })
+
+    except Task.DoesNotExist:
+        return JsonResponse({'error': 'Задача не найдена'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@require_GET
+async def task_events(request):
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+    # Под WSGI бесконечный async-поток занял бы поток сервера навсегда
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'error': 'Поток событий доступен только под ASGI'}, status=501)
+
+    heartbeat = getattr(settings, 'JOURNAL_EVENTS_HEARTBEAT', EVENTS_HEARTBEAT)
+    broker = get_broker()
+    subscription = broker.subscribe(user.pk)
+
+    # Переподключившийся клиент пропустил изменения, пока был отключён
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    missed = last_event_id.isdigit() and int(last_event_id) < await aget_change_seq(user.pk)
+
+    async def stream():
+        try:
+            yield 'retry: 3000\n\n'
+            if missed:
+                yield format_event({'type': RESYNC, 'seq': None, 'data': None})
+            while True:
+                try:
+                    event = await subscription.get(timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    # Комментарий держит соединение живым через прокси
+                    yield ': ping\n\n'
+                    continue
+                yield format_event(event)
+        finally:
+            broker.unsubscribe(subscription)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
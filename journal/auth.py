@@ -0,0 +1,76 @@
+"""
+Пользователь запроса без похода в auth_user на каждый запрос API.
+
+CachedAuthenticationMiddleware заменяет AuthenticationMiddleware: пользователь
+берётся из кэша JOURNAL_USER_CACHE (по умолчанию locmem — свой в каждом
+процессе) на JOURNAL_USER_CACHE_TIMEOUT секунд. Кэшированный пользователь
+отдаётся, только если хэш сессии совпал с его хэшем пароля; иначе — например,
+пароль сменили в другом процессе — проверку целиком делает
+django.contrib.auth.get_user с чтением из БД. Сохранение и удаление
+пользователя сбрасывают запись (journal.signals). Права из групп в кэш не
+попадают: has_perm читает их заново в каждом запросе.
+"""
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+USER_CACHE_TIMEOUT = 60
+
+
+def get_user_cache():
+    return caches[getattr(settings, 'JOURNAL_USER_CACHE', 'default')]
+
+
+def user_cache_key(user_id):
+    return f'journal:user:{user_id}'
+
+
+def invalidate_user(user_id):
+    # После коммита: иначе параллельный запрос успеет закэшировать старую строку
+    transaction.on_commit(lambda: get_user_cache().delete(user_cache_key(user_id)))
+
+
+def get_user(request):
+    timeout = getattr(settings, 'JOURNAL_USER_CACHE_TIMEOUT', USER_CACHE_TIMEOUT)
+    session = request.session
+    user_id = session.get(SESSION_KEY)
+    if not timeout or user_id is None or session.get(BACKEND_SESSION_KEY) not in settings.AUTHENTICATION_BACKENDS:
+        return auth.get_user(request)
+
+    key = user_cache_key(user_id)
+    user = get_user_cache().get(key)
+    session_hash = session.get(HASH_SESSION_KEY)
+    if user is not None and session_hash and constant_time_compare(session_hash, user.get_session_auth_hash()):
+        return user
+
+    user = auth.get_user(request)
+    if user.is_authenticated:
+        get_user_cache().set(key, user, timeout)
+    return user
+
+
+def _cached_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = get_user(request)
+    return request._cached_user
+
+
+async def _acached_user(request):
+    if not hasattr(request, '_acached_user'):
+        request._acached_user = await sync_to_async(get_user)(request)
+    return request._acached_user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    def process_request(self, request):
+        super().process_request(request)
+        request.user = SimpleLazyObject(lambda: _cached_user(request))
+        request.auser = partial(_acached_user, request)
@@ -0,0 +1,164 @@
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+WEEK_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+class CacheStats:
+    """Счётчики попаданий в кэш недель в пределах процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def as_dict(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / total, 4) if total else None,
+            }
+
+
+week_cache_stats = CacheStats()
+
+
+def get_week_cache():
+    return caches[getattr(settings, 'JOURNAL_WEEK_CACHE', 'default')]
+
+
+def week_start_for(date):
+    if isinstance(date, str):
+        date = parse_date(date)
+    return date - timedelta(days=date.weekday())
+
+
+def day_tasks_key(user_id, week_start):
+    return f'journal:week:{user_id}:{week_start.isoformat()}'
+
+
+def weekly_tasks_key(user_id, week_start):
+    return f'journal:weekly:{user_id}:{week_start.isoformat()}'
+
+
+def heatmap_key(user_id, period):
+    # period — '2024' или '2024-05'
+    return f'journal:heatmap:{user_id}:{period}'
+
+
+def heatmap_periods(date):
+    """Периоды карты активности, в которые попадает дата: год и месяц."""
+    if isinstance(date, str):
+        date = parse_date(date)
+    return f'{date:%Y}', f'{date:%Y-%m}'
+
+
+def recurring_rules_key(user_id):
+    return f'journal:recurring:{user_id}'
+
+
+def recurrence_exceptions_key(user_id, week_start):
+    return f'journal:recurrence-exceptions:{user_id}:{week_start.isoformat()}'
+
+
+def generation_key(key):
+    # Поколения хранятся без срока: они крошечные, а вытесненное поколение
+    # просто заводится заново — снимки под ним станут промахами
+    return f'{key}:gen'
+
+
+def _new_generation():
+    return uuid.uuid4().hex
+
+
+def _versioned_keys(keys, generations):
+    return {key: f'{key}:{generations[generation_key(key)]}' for key in keys}
+
+
+def snapshot_keys(cache, keys):
+    """
+    {ключ: ключ снимка текущего поколения}. Вызывается до выборки из БД:
+    снимок, прочитанный до коммита чужой записи, ляжет под старое поколение,
+    которое запись уже сменила (или сменит), и читать его никто не будет.
+    Простое удаление ключа после коммита этого не даёт — параллельный запрос
+    мог прочитать старые строки раньше и положить их в кэш уже после удаления.
+    """
+    generations = cache.get_many([generation_key(key) for key in keys])
+    for key in keys:
+        gen_key = generation_key(key)
+        if gen_key not in generations:
+            # Поколения нет (новый ключ или вытеснен) — заводим; если его успел
+            # завести или сменить другой запрос, берём его значение
+            generation = _new_generation()
+            if not cache.add(gen_key, generation, None):
+                generation = cache.get(gen_key, generation)
+            generations[gen_key] = generation
+    return _versioned_keys(keys, generations)
+
+
+async def asnapshot_keys(cache, keys):
+    generations = await cache.aget_many([generation_key(key) for key in keys])
+    for key in keys:
+        gen_key = generation_key(key)
+        if gen_key not in generations:
+            generation = _new_generation()
+            if not await cache.aadd(gen_key, generation, None):
+                generation = await cache.aget(gen_key, generation)
+            generations[gen_key] = generation
+    return _versioned_keys(keys, generations)
+
+
+def _expire_after_commit(keys):
+    if not keys:
+        return
+    # Новое поколение — после коммита: снимки старого поколения, в том числе
+    # записанные параллельным запросом позже, больше не читаются и истекают сами
+    transaction.on_commit(lambda: get_week_cache().set_many(
+        {generation_key(key): _new_generation() for key in keys}, None
+    ))
+
+
+def invalidate_weeks(user_id, dates=(), weekly_dates=()):
+    keys = {day_tasks_key(user_id, week_start_for(date)) for date in dates}
+    keys |= {weekly_tasks_key(user_id, week_start_for(date)) for date in weekly_dates}
+    # Недельные задачи в карту активности не входят, как и в DailyStats
+    keys |= {heatmap_key(user_id, period) for date in dates for period in heatmap_periods(date)}
+    _expire_after_commit(keys)
+
+
+def invalidate_recurrence(user_id, exception_dates=(), rules=False):
+    keys = {recurrence_exceptions_key(user_id, week_start_for(date)) for date in exception_dates}
+    if rules:
+        keys.add(recurring_rules_key(user_id))
+    _expire_after_commit(keys)
+
+
+def invalidate_task(task):
+    """
+    Сбрасывает снимки, в которых задача была до изменения и оказалась после:
+    при переносе задачи на другую неделю сбрасываются обе недели.
+    """
+    loaded = getattr(task, '_loaded_values', {})
+    dates, weekly_dates = set(), set()
+
+    for is_weekly, date in (
+        (task.is_weekly, task.date),
+        (loaded.get('is_weekly'), loaded.get('date')),
+    ):
+        if date is not None:
+            (weekly_dates if is_weekly else dates).add(date)
+
+    invalidate_weeks(task.user_id, dates, weekly_dates)
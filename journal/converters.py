@@ -0,0 +1,9 @@
+class OccurrenceIdConverter:
+    # r<id правила>-<дата>, например r12-2025-10-20
+    regex = r'r\d+-\d{4}-\d{2}-\d{2}'
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+EVENTS_QUEUE_SIZE = 100
+EVENTS_HEARTBEAT = 15
+RESYNC = 'resync'
+
+
+class Subscription:
+    """
+    Подписка одного SSE-соединения. Очередь ограничена: если клиент не успевает
+    читать, накопленные события заменяются одним resync — клиент перечитает неделю.
+    """
+
+    def __init__(self, user_id, queue_size):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(queue_size)
+        self.dropped = 0
+
+    def push(self, event):
+        # Вызывается только из цикла событий подписчика
+        if self.queue.full():
+            self.dropped += self.queue.qsize()
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            event = {'type': RESYNC, 'seq': event.get('seq'), 'data': None}
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class InProcessBroker:
+    """
+    Pub/sub в памяти процесса: события доходят до подписчиков того же процесса.
+    Для нескольких процессов нужен брокер с тем же интерфейсом поверх общего
+    транспорта, подключается настройкой JOURNAL_EVENT_BROKER.
+    """
+
+    def __init__(self, queue_size=None):
+        self.queue_size = queue_size or getattr(settings, 'JOURNAL_EVENTS_QUEUE_SIZE', EVENTS_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def subscribe(self, user_id):
+        subscription = Subscription(user_id, self.queue_size)
+        with self._lock:
+            self._subscribers[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id, event):
+        # Публикуют синхронные view из своих потоков — в очередь кладёт цикл подписчика
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.push, event)
+            except RuntimeError:
+                # Цикл уже закрыт, соединение отписывается само
+                pass
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                broker_class = import_string(
+                    getattr(settings, 'JOURNAL_EVENT_BROKER', 'journal.events.InProcessBroker')
+                )
+                _broker = broker_class()
+    return _broker
+
+
+def publish_event(user_id, event_type, data=None, seq=None):
+    """Отправляет событие подписчикам пользователя после коммита текущей транзакции."""
+    event = {'type': event_type, 'seq': seq, 'data': data}
+    transaction.on_commit(lambda: get_broker().publish(user_id, event))
+
+
+def format_event(event):
+    lines = []
+    if event.get('seq') is not None:
+        lines.append(f"id: {event['seq']}")
+    lines.append(f"event: {event['type']}")
+    lines.append(f"data: {json.dumps(event.get('data'), ensure_ascii=False)}")
+    return '\n'.join(lines) + '\n\n'
@@ -0,0 +1,123 @@
+import secrets
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import CalendarFeedToken, Task
+
+FEED_CHUNK_SIZE = 500
+FEED_PAST_DAYS = 180
+FEED_KINDS = ('event', 'todo')
+LINE_LIMIT = 75
+
+
+def issue_feed_token(user, reset=False):
+    """Токен ленты пользователя; reset=True выдаёт новый, старая ссылка перестаёт работать."""
+    token = secrets.token_urlsafe(32)
+    if reset:
+        feed, _ = CalendarFeedToken.objects.update_or_create(user=user, defaults={'token': token})
+    else:
+        feed, _ = CalendarFeedToken.objects.get_or_create(user=user, defaults={'token': token})
+    return feed.token
+
+
+def feed_window_start():
+    """Первый день ленты: JOURNAL_CALENDAR_PAST_DAYS назад от сегодня, None — окна нет."""
+    past_days = getattr(settings, 'JOURNAL_CALENDAR_PAST_DAYS', FEED_PAST_DAYS)
+    if past_days is None:
+        return None
+    return timezone.localdate() - timedelta(days=past_days)
+
+
+def feed_state(token):
+    """
+    Владелец ленты и её версия одним запросом по токену, без сессии и без
+    строк задач: номер изменений (ETag) и время последнего изменения
+    (Last-Modified) из ChangeSequence. None, если токен неизвестен.
+    Окно ленты сдвигается каждый день и без правок, поэтому его начало
+    входит в версию, а Last-Modified не раньше начала сегодняшних суток.
+    """
+    row = CalendarFeedToken.objects.filter(token=token).values_list(
+        'user_id', 'user__change_sequence__seq', 'user__change_sequence__updated_at'
+    ).first()
+    if row is None:
+        return None
+    user_id, seq, updated_at = row
+    window_start = feed_window_start()
+    if window_start is not None:
+        today = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+        updated_at = max(updated_at, today) if updated_at else today
+    return {'user_id': user_id, 'seq': seq or 0, 'updated_at': updated_at, 'window_start': window_start}
+
+
+def escape_text(value):
+    return (
+        value.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold_line(line):
+    """Переносит строку по 75 октетов (RFC 5545, 3.1), не разрывая символы UTF-8."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= LINE_LIMIT:
+        return line + '\r\n'
+    parts = []
+    start = 0
+    limit = LINE_LIMIT
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Не режем многобайтовый символ посередине
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode('utf-8'))
+        start = end
+        limit = LINE_LIMIT - 1  # продолжение начинается с пробела
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _utc_stamp(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def _task_lines(task_id, title, description, date, is_done, updated_at, host, kind):
+    component = 'VTODO' if kind == 'todo' else 'VEVENT'
+    stamp = _utc_stamp(updated_at)
+    yield f'BEGIN:{component}'
+    yield f'UID:task-{task_id}@{host}'
+    yield f'DTSTAMP:{stamp}'
+    yield f'LAST-MODIFIED:{stamp}'
+    yield f'DTSTART;VALUE=DATE:{date:%Y%m%d}'
+    if kind == 'todo':
+        yield f'DUE;VALUE=DATE:{date + timedelta(days=1):%Y%m%d}'
+        yield f"STATUS:{'COMPLETED' if is_done else 'NEEDS-ACTION'}"
+        yield f'SUMMARY:{escape_text(title)}'
+    else:
+        yield f'DTEND;VALUE=DATE:{date + timedelta(days=1):%Y%m%d}'
+        yield 'TRANSP:TRANSPARENT'
+        # У VEVENT нет статуса выполнения — отмечаем его в названии
+        yield f"SUMMARY:{'✓ ' if is_done else ''}{escape_text(title)}"
+    if description:
+        yield f'DESCRIPTION:{escape_text(description)}'
+    yield f'END:{component}'
+
+
+def feed_lines(user_id, host, kind='event', chunk_size=FEED_CHUNK_SIZE):
+    """
+    iCalendar-лента дневных задач пользователя построчно. Задачи читаются
+    курсором порциями, окно в прошлое — JOURNAL_CALENDAR_PAST_DAYS (None — все).
+    """
+    tasks = Task.objects.filter(user_id=user_id, is_weekly=False)
+    window_start = feed_window_start()
+    if window_start is not None:
+        tasks = tasks.filter(date__gte=window_start)
+    rows = tasks.order_by('date', 'created_at').values_list(
+        'id', 'title', 'description', 'date', 'is_done', 'updated_at'
+    ).iterator(chunk_size=chunk_size)
+
+    yield 'BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//journal//tasks//RU\r\nCALSCALE:GREGORIAN\r\n'
+    yield fold_line('X-WR-CALNAME:Задачи')
+    for row in rows:
+        yield ''.join(fold_line(line) for line in _task_lines(*row, host=host, kind=kind))
+    yield 'END:VCALENDAR\r\n'
@@ -0,0 +1,130 @@
+"""
+Логирование через очередь: QueueListenerHandler кладёт записи в очередь, а
+форматирование и запись в поток делает фоновый QueueListener — запрос не ждёт
+вывода. SamplingFilter пропускает долю записей горячих логгеров, JsonFormatter —
+по строке JSON на запись для продакшена. Всё подключается через LOGGING.
+"""
+import copy
+import json
+import logging
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Атрибуты любой LogRecord; остальное пришло через extra= и попадает в JSON
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def parse_pairs(value, convert=str):
+    """'journal=DEBUG,django.db=INFO' из переменной окружения в словарь."""
+    pairs = {}
+    for item in (value or '').split(','):
+        name, sep, setting = item.partition('=')
+        if sep and name.strip():
+            pairs[name.strip()] = convert(setting.strip())
+    return pairs
+
+
+class ColorFormatter(logging.Formatter):
+    """Цвета для терминала."""
+    COLORS = {
+        'DEBUG': '\033[94m',  # Синий
+        'INFO': '\033[92m',  # Зелёный
+        'WARNING': '\033[93m',  # Жёлтый
+        'ERROR': '\033[91m',  # Красный
+        'CRITICAL': '\033[95m',  # Фиолетовый
+    }
+    RESET = '\033[0m'
+
+    def format(self, record):
+        log_color = self.COLORS.get(record.levelname, self.RESET)
+        record.asctime = self.formatTime(record, "%Y-%m-%d %H:%M:%S")
+        message = super().format(record)
+        return f"{log_color}{message}{self.RESET}"
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and not key.startswith('_'):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exception'] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Пропускает долю записей ниже WARNING: rates — {логгер: доля}, правило
+    логгера действует и на его потомков. Предупреждения и ошибки не отбрасываются.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = dict(rates or {})
+        self._resolved = {}
+
+    def rate_for(self, name):
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate = 1.0
+            # Самое длинное совпадающее имя: journal.views точнее, чем journal
+            for prefix in sorted(self.rates, key=len, reverse=True):
+                if name == prefix or name.startswith(prefix + '.'):
+                    rate = float(self.rates[prefix])
+                    break
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1 or random.random() < rate
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    QueueHandler со своим QueueListener (в Python 3.11 dictConfig не умеет их
+    связывать). handlers — уже настроенные обработчики: 'cfg://handlers.console';
+    их имена должны идти в LOGGING раньше по алфавиту, чем имя этого обработчика.
+    """
+
+    def __init__(self, handlers, respect_handler_level=True):
+        super().__init__(queue.SimpleQueue())
+        handlers = [handlers[i] for i in range(len(handlers))]
+        for handler in handlers:
+            if not isinstance(handler, logging.Handler):
+                raise ValueError(f'Обработчик для очереди ещё не настроен: {handler!r}')
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=respect_handler_level)
+        self.listener.start()
+
+    def close(self):
+        # logging.shutdown() при выходе закрывает обработчики: listener дописывает
+        # очередь, пока целевые обработчики ещё открыты
+        if self.listener._thread is not None:
+            self.listener.stop()
+        super().close()
+
+    def prepare(self, record):
+        # Сообщение собирается здесь: аргументы и extra (объекты ORM, request)
+        # нельзя отдавать в другой поток. Форматирует уже обработчик в потоке listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        for key, value in list(vars(record).items()):
+            if key not in RECORD_ATTRIBUTES and not isinstance(value, (str, int, float, bool, type(None))):
+                setattr(record, key, str(value))
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
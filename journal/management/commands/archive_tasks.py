@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from journal.archive import archive_done_tasks
+
+
+class Command(BaseCommand):
+    help = 'Переносит выполненные задачи старше заданного числа недель в TaskArchive порциями'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--weeks', type=int, default=None,
+                            help='Возраст задач в неделях (по умолчанию JOURNAL_ARCHIVE_AFTER_WEEKS)')
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Задач в одной транзакции (по умолчанию JOURNAL_ARCHIVE_BATCH_SIZE)')
+        parser.add_argument('--max-batches', type=int, default=None,
+                            help='Остановиться после указанного числа порций')
+        parser.add_argument('--pause', type=float, default=0,
+                            help='Пауза между порциями в секундах')
+
+    def handle(self, *args, **options):
+        def report(batch, moved, last_id):
+            self.stdout.write(f'Порция {batch}: перенесено {moved}, последний id {last_id}')
+
+        total = archive_done_tasks(
+            weeks=options['weeks'],
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            pause=options['pause'],
+            on_batch=report if options['verbosity'] > 1 else None,
+        )
+        self.stdout.write(self.style.SUCCESS(f'Перенесено в архив задач: {total}'))
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import statistics
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from types import ModuleType
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client, override_settings
+
+from journal import async_views, views
+from journal.models import Task
+from journal.services import get_week_range
+from journal.urls import task_api_patterns
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает API задач под одновременными клиентами: синхронные view в пуле '
+        'потоков (WSGI), синхронные и async view через ASGI-обработчик'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=50, help='Одновременных клиентов')
+        parser.add_argument('--requests', type=int, default=2000, help='Всего запросов на режим')
+        parser.add_argument('--threads', type=int, default=8, help='Размер пула потоков WSGI-режима')
+        parser.add_argument('--write-ratio', type=float, default=0.2,
+                            help='Доля запросов, изменяющих задачу')
+
+    def handle(self, *args, **options):
+        user = User.objects.create(username=f'bench-{uuid.uuid4().hex[:12]}')
+        try:
+            self.run(user, options)
+        finally:
+            # Каскадом уходят задачи, счётчики и сессии стенда
+            User.objects.filter(pk=user.pk).delete()
+
+    def run(self, user, options):
+        start_date, _ = get_week_range()
+        Task.objects.bulk_create([
+            Task(user=user, title=f'Задача {day}.{n}', date=start_date + timedelta(days=day), is_done=n % 2 == 0)
+            for day in range(7) for n in range(10)
+        ])
+        task_ids = list(Task.objects.filter(user=user).values_list('id', flat=True))
+
+        login = Client()
+        login.force_login(user)
+        cookies = login.cookies
+
+        # i-й запрос одинаков во всех режимах: чтение недели, задачи или правка
+        every_write = max(1, round(1 / options['write_ratio'])) if options['write_ratio'] else 0
+        plan = []
+        for i in range(options['requests']):
+            task_id = task_ids[i % len(task_ids)]
+            if every_write and i % every_write == 0:
+                plan.append(('post', f'/api/tasks/{task_id}/update/', {'is_done': i % 2 == 0}))
+            elif i % 2:
+                plan.append(('get', '/api/tasks/week/', None))
+            else:
+                plan.append(('get', f'/api/tasks/{task_id}/', None))
+
+        results = {}
+        # Клиенты ходят на хост testserver: вне тестового раннера его нет в ALLOWED_HOSTS
+        allowed_hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+        with override_settings(ROOT_URLCONF=self.urlconf(views), ALLOWED_HOSTS=allowed_hosts):
+            results[f"WSGI, sync view, {options['threads']} потоков"] = self.run_threads(plan, cookies, options)
+            results['ASGI, sync view'] = asyncio.run(self.run_async(plan, cookies, options))
+        with override_settings(ROOT_URLCONF=self.urlconf(async_views), ALLOWED_HOSTS=allowed_hosts):
+            results['ASGI, async view'] = asyncio.run(self.run_async(plan, cookies, options))
+
+        self.stdout.write(
+            f"{options['requests']} запросов, {options['clients']} клиентов, "
+            f"доля записей {options['write_ratio']:.0%}"
+        )
+        for name, (elapsed, timings, errors) in results.items():
+            self.stdout.write(
+                f'{name:28} {len(timings) / elapsed:8.0f} запр/с  '
+                f'p50 {statistics.median(timings):7.1f} мс  '
+                f'p95 {statistics.quantiles(timings, n=20)[-1]:7.1f} мс  ошибок {errors}'
+            )
+
+        failed = [name for name, (_, timings, errors) in results.items() if errors == len(timings)]
+        if failed:
+            raise CommandError(f"Все запросы завершились ошибкой: {', '.join(failed)} — замеры недействительны")
+
+    @staticmethod
+    def urlconf(task_views):
+        # Оба набора view в одном процессе: urlconf-модуль только с API задач
+        module = ModuleType(f'journal_benchmark_urls_{task_views.__name__}')
+        module.urlpatterns = task_api_patterns(task_views)
+        return module
+
+    def run_threads(self, plan, cookies, options):
+        def call(step):
+            client = Client()
+            client.cookies = cookies
+            method, url, data = step
+            started = time.perf_counter()
+            if method == 'post':
+                response = client.post(url, json.dumps(data), content_type='application/json')
+            else:
+                response = client.get(url)
+            return (time.perf_counter() - started) * 1000, response.status_code >= 400
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+            # Больше запросов в полёте, чем потоков: остальные ждут в очереди пула
+            outcomes = list(pool.map(call, plan))
+        elapsed = time.perf_counter() - started
+        return elapsed, [ms for ms, _ in outcomes], sum(failed for _, failed in outcomes)
+
+    async def run_async(self, plan, cookies, options):
+        semaphore = asyncio.Semaphore(options['clients'])
+
+        async def call(step):
+            async with semaphore:
+                client = AsyncClient()
+                client.cookies = cookies
+                method, url, data = step
+                started = time.perf_counter()
+                if method == 'post':
+                    response = await client.post(url, json.dumps(data), content_type='application/json')
+                else:
+                    response = await client.get(url)
+                return (time.perf_counter() - started) * 1000, response.status_code >= 400
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(call(step) for step in plan))
+        elapsed = time.perf_counter() - started
+        return elapsed, [ms for ms, _ in outcomes], sum(failed for _, failed in outcomes)
@@ -0,0 +1,302 @@
+import json
+import math
+import platform
+import random
+import sqlite3
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from importlib import import_module
+
+import django
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from journal.models import Task
+from journal.stats import apply_bulk_stats_delta
+
+OPERATIONS = ('week', 'create', 'update', 'delete')
+DEFAULT_MIX = 'week:50,create:20,update:25,delete:5'
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition(':')
+        if name not in OPERATIONS:
+            raise CommandError(f'Неизвестная операция в --mix: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный прогон: создаёт пользователей с задачами, гоняет WeekView и API '
+        'create/update/delete с заданной параллельностью и пишет p50/p95/p99, запр/с '
+        'и число SQL-запросов на запрос в JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--tasks-per-day', type=float, default=4,
+                            help='Среднее число дневных задач в день (распределение Пуассона)')
+        parser.add_argument('--weeks', type=int, default=12, help='Недель истории у каждого пользователя')
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--mix', default=DEFAULT_MIX,
+                            help=f'Доли операций, по умолчанию {DEFAULT_MIX}')
+        parser.add_argument('--seed', type=int, default=1, help='Зерно генератора для повторяемых прогонов')
+        parser.add_argument('--base-url',
+                            help='Адрес запущенного сервера с той же БД; без него — тестовый клиент в процессе')
+        parser.add_argument('--output', help='Куда записать JSON с результатами')
+        parser.add_argument('--keep-data', action='store_true', help='Не удалять созданных пользователей')
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options['seed'])
+        mix = parse_mix(options['mix'])
+        run_id = uuid.uuid4().hex[:8]
+
+        started = time.perf_counter()
+        users, seeded_tasks = self.seed(run_id, options)
+        seed_seconds = time.perf_counter() - started
+        self.stdout.write(f'Создано пользователей: {len(users)}, задач: {seeded_tasks} за {seed_seconds:.1f} с')
+
+        try:
+            # Тестовый клиент ходит на хост testserver: вне тестового раннера его нет
+            # в ALLOWED_HOSTS, и каждый запрос получил бы 400 DisallowedHost
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                report = self.run(users, mix, options)
+        finally:
+            if not options['keep_data']:
+                User.objects.filter(pk__in=list(users)).delete()
+
+        report['config'] = {
+            key: options[key] for key in
+            ('users', 'tasks_per_day', 'weeks', 'requests', 'concurrency', 'mix', 'seed', 'base_url')
+        }
+        report['environment'] = {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'sqlite': sqlite3.sqlite_version if connection.vendor == 'sqlite' else None,
+            'debug': settings.DEBUG,
+        }
+        report['seeded_tasks'] = seeded_tasks
+        report['seed_seconds'] = round(seed_seconds, 3)
+        report['finished_at'] = timezone.now().isoformat()
+
+        self.print_report(report)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, ensure_ascii=False, indent=2)
+            self.stdout.write(f"Результаты записаны в {options['output']}")
+
+        total = report['total']
+        if total['requests'] and total['errors'] == total['requests']:
+            raise CommandError(
+                f"Все запросы завершились ошибкой ({total['status_codes']}) — замеры недействительны"
+            )
+
+    def seed(self, run_id, options):
+        """
+        Пользователи с историей задач: число задач в день по Пуассону, прошлое чаще
+        выполнено. Возвращает {user_id: id задач от сегодня и дальше} и число задач.
+        """
+        today = timezone.localdate()
+        first_day = today - timedelta(weeks=options['weeks'])
+        users = {}
+        seeded_tasks = 0
+
+        for n in range(options['users']):
+            user = User.objects.create(username=f'bench-{run_id}-{n}')
+            tasks = []
+            day = first_day
+            while day <= today + timedelta(days=7):
+                for i in range(self.poisson(options['tasks_per_day'])):
+                    done_chance = 0.8 if day < today else 0.3 if day == today else 0.0
+                    tasks.append(Task(
+                        user=user,
+                        title=f'Задача {i + 1} на {day:%d.%m}',
+                        description='Подробности задачи ' * self.random.randint(1, 6)
+                        if self.random.random() < 0.3 else '',
+                        date=day,
+                        is_done=self.random.random() < done_chance,
+                    ))
+                if day.weekday() == 0:
+                    for i in range(self.poisson(2)):
+                        task = Task(user=user, title=f'Цель недели {i + 1}', date=day, is_weekly=True,
+                                    is_done=day < today and self.random.random() < 0.6)
+                        task.sync_week_start()
+                        tasks.append(task)
+                day += timedelta(days=1)
+
+            Task.objects.bulk_create(tasks, batch_size=1000)
+            # bulk_create не шлёт сигналов — счётчики дней заполняем сами
+            totals, dones = Counter(), Counter()
+            for task in tasks:
+                if not task.is_weekly:
+                    totals[task.date] += 1
+                    dones[task.date] += task.is_done
+            apply_bulk_stats_delta(user.pk, {date: (totals[date], dones[date]) for date in totals})
+            users[user.pk] = [task.pk for task in tasks if not task.is_weekly and task.date >= today]
+            seeded_tasks += len(tasks)
+
+        return users, seeded_tasks
+
+    def poisson(self, mean):
+        # Алгоритм Кнута: для средних в единицы задач в день этого достаточно
+        limit, k, p = math.exp(-mean), 0, 1.0
+        while True:
+            p *= self.random.random()
+            if p <= limit:
+                return k
+            k += 1
+
+    def run(self, users, mix, options):
+        today = timezone.localdate()
+        sessions = {user_id: self.login_cookie(user_id) for user_id in users}
+        task_ids = {user_id: list(ids) for user_id, ids in users.items()}
+        lock = threading.Lock()
+
+        # План строится заранее тем же генератором, чтобы прогоны с одним --seed совпадали
+        names, weights = zip(*mix.items())
+        plan = [
+            (self.random.choice(list(users)), self.random.choices(names, weights)[0], self.random.random())
+            for _ in range(options['requests'])
+        ]
+
+        def request(step):
+            user_id, operation, roll = step
+            with lock:
+                ids = task_ids[user_id]
+                if operation == 'delete' and ids:
+                    task_id = ids.pop(int(roll * len(ids)))
+                elif operation in ('update', 'delete') and ids:
+                    task_id = ids[int(roll * len(ids))]
+                else:
+                    task_id = None
+            if operation in ('update', 'delete') and task_id is None:
+                operation = 'week'
+
+            if operation == 'week':
+                method, path, body = 'GET', '/', None
+            elif operation == 'create':
+                date = today + timedelta(days=int(roll * 7))
+                method, path, body = 'POST', '/api/tasks/create/', {'title': 'Новая задача', 'date': str(date)}
+            elif operation == 'update':
+                method, path, body = 'POST', f'/api/tasks/{task_id}/update/', {'is_done': roll < 0.5}
+            else:
+                method, path, body = 'POST', f'/api/tasks/{task_id}/delete/', None
+
+            status, elapsed, queries, payload = self.send(options['base_url'], sessions[user_id], method, path, body)
+            if operation == 'create' and status == 201:
+                with lock:
+                    task_ids[user_id].append(payload['new_task_id'])
+            return operation, status, elapsed, queries
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            outcomes = list(pool.map(request, plan))
+        wall = time.perf_counter() - started
+
+        by_operation = defaultdict(list)
+        for outcome in outcomes:
+            by_operation[outcome[0]].append(outcome)
+
+        report = {'wall_seconds': round(wall, 3), 'requests_per_second': round(len(outcomes) / wall, 1)}
+        report['operations'] = {
+            name: self.summarize(rows, wall) for name, rows in sorted(by_operation.items())
+        }
+        report['total'] = self.summarize(outcomes, wall)
+        return report
+
+    def summarize(self, rows, wall):
+        timings = sorted(elapsed for _, _, elapsed, _ in rows)
+        queries = [count for _, _, _, count in rows if count is not None]
+        return {
+            'requests': len(rows),
+            'errors': sum(1 for _, status, _, _ in rows if status >= 400),
+            'status_codes': dict(Counter(str(status) for _, status, _, _ in rows)),
+            'requests_per_second': round(len(rows) / wall, 1),
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'p99_ms': round(percentile(timings, 99), 2),
+            'mean_ms': round(statistics.fmean(timings), 2),
+            'queries_per_request': round(statistics.fmean(queries), 2) if queries else None,
+        }
+
+    def login_cookie(self, user_id):
+        # Сессия пишется напрямую: так вход работает и для внешнего сервера с той же БД
+        user = User.objects.get(pk=user_id)
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.save()
+        return session.session_key
+
+    def send(self, base_url, session_key, method, path, body):
+        data = json.dumps(body) if body is not None else ''
+        if base_url:
+            request = urllib.request.Request(
+                base_url.rstrip('/') + path, data=data.encode() if method == 'POST' else None, method=method,
+                headers={'Cookie': f'{settings.SESSION_COOKIE_NAME}={session_key}',
+                         'Content-Type': 'application/json'},
+            )
+            started = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request) as response:
+                    status, content = response.status, response.read()
+            except urllib.error.HTTPError as e:
+                status, content = e.code, e.read()
+            elapsed = (time.perf_counter() - started) * 1000
+            queries = None
+        else:
+            client = Client()
+            client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                if method == 'POST':
+                    response = client.post(path, data, content_type='application/json')
+                else:
+                    response = client.get(path)
+                elapsed = (time.perf_counter() - started) * 1000
+            status, content = response.status_code, response.content
+            queries = len(captured)
+
+        payload = None
+        if status == 201:
+            payload = json.loads(content)
+        return status, elapsed, queries, payload
+
+    def print_report(self, report):
+        self.stdout.write(
+            f"{report['total']['requests']} запросов за {report['wall_seconds']:.1f} с, "
+            f"{report['requests_per_second']} запр/с"
+        )
+        for name, row in [*report['operations'].items(), ('всего', report['total'])]:
+            queries = row['queries_per_request']
+            self.stdout.write(
+                f"{name:8} {row['requests']:6} запр  p50 {row['p50_ms']:7.1f}  p95 {row['p95_ms']:7.1f}  "
+                f"p99 {row['p99_ms']:7.1f} мс  SQL/запр {queries if queries is not None else '—':>5}  "
+                f"ошибок {row['errors']}"
+            )
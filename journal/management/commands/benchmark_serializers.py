@@ -0,0 +1,69 @@
+import json
+import statistics
+import time
+import uuid
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from journal import serializers
+from journal.models import Task
+from journal.serializers import parse_fields, serialize_task, task_rows
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает сериализацию списка задач: экземпляры модели против values_list, json против orjson'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000)
+        parser.add_argument('--iterations', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.run(options)
+            # Тестовые данные не сохраняем
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        user = User.objects.create(username=f'bench-{uuid.uuid4().hex[:12]}')
+        start = date(2024, 1, 1)
+        Task.objects.bulk_create([
+            Task(user=user, title=f'Задача {n}', description='Описание задачи ' * 5,
+                 date=start + timedelta(days=n % 365), is_done=n % 3 == 0)
+            for n in range(options['tasks'])
+        ], batch_size=1000)
+        tasks = Task.objects.filter(user=user).order_by('date', 'id')
+        short = parse_fields('title,is_done')
+
+        def json_dumps(data):
+            return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+        cases = {
+            'модели + serialize_task, json': lambda: json_dumps([serialize_task(t) for t in tasks.all()]),
+            'values_list, json': lambda: json_dumps(task_rows(tasks)),
+            'values_list, ?fields=title,is_done, json': lambda: json_dumps(task_rows(tasks, short)),
+        }
+        if serializers.orjson is not None:
+            cases.update({
+                'модели + serialize_task, orjson': lambda: serializers.dumps([serialize_task(t) for t in tasks.all()]),
+                'values_list, orjson': lambda: serializers.dumps(task_rows(tasks)),
+                'values_list, ?fields=title,is_done, orjson': lambda: serializers.dumps(task_rows(tasks, short)),
+            })
+        else:
+            self.stdout.write('orjson не установлен, сравнивается только json')
+
+        self.stdout.write(f"{options['tasks']} задач, {options['iterations']} прогонов (выборка из БД + JSON)")
+        for name, case in cases.items():
+            size = len(case())
+            timings = []
+            for _ in range(options['iterations']):
+                started = time.perf_counter()
+                case()
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f'{name:44} медиана {statistics.median(timings):7.2f} мс, '
+                f'мин {min(timings):7.2f} мс, {size / 1024:7.1f} КБ'
+            )
@@ -0,0 +1,90 @@
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.loader import render_to_string
+from django.test import RequestFactory, override_settings
+from django.utils import timezone
+
+from journal.models import Task
+from journal.services import build_week, fragment_cache_context, get_week_range, rows_version
+
+DUMMY_ALIAS = 'journal-benchmark-dummy'
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает время рендера week.html с кэшем фрагментов и без него'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks-per-day', type=int, default=15)
+        parser.add_argument('--weekly-tasks', type=int, default=10)
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def handle(self, *args, **options):
+        caches_setting = {
+            **caches.settings,
+            DUMMY_ALIAS: {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+        }
+        with override_settings(CACHES=caches_setting), transaction.atomic():
+            self.run(options)
+            # Тестовые данные не сохраняем
+            transaction.set_rollback(True)
+
+    def run(self, options):
+        user = User.objects.create(username=f'bench-{uuid.uuid4().hex[:12]}')
+        start_date, _ = get_week_range()
+        Task.objects.bulk_create([
+            Task(user=user, title=f'Задача {day}.{n}', description='Описание задачи ' * 5,
+                 date=start_date + timedelta(days=day), is_done=n % 3 == 0)
+            for day in range(7) for n in range(options['tasks_per_day'])
+        ] + [
+            Task(user=user, title=f'Недельная {n}', date=start_date, is_weekly=True)
+            for n in range(options['weekly_tasks'])
+        ])
+
+        request = RequestFactory().get('/')
+        request.user = user
+        week = build_week(user, start_date)
+        fragments = fragment_cache_context()
+
+        def render(alias):
+            context = {**week, **fragments, 'fragment_cache': alias}
+            render_to_string('journal/week.html', context, request=request)
+
+        def measure(alias, before_each=None):
+            timings = []
+            render(alias)
+            for _ in range(options['iterations']):
+                if before_each:
+                    before_each()
+                started = time.perf_counter()
+                render(alias)
+                timings.append((time.perf_counter() - started) * 1000)
+            return timings
+
+        def touch_one_day():
+            # Правка одной задачи меняет версию только её дня
+            day = week['days'][0]
+            day['tasks'][0].updated_at = timezone.now()
+            day['version'] = rows_version(day['tasks'])
+
+        results = {
+            'без кэша фрагментов': measure(DUMMY_ALIAS),
+            'кэш фрагментов, без изменений': measure(fragments['fragment_cache']),
+            'кэш фрагментов, изменён один день': measure(fragments['fragment_cache'], touch_one_day),
+        }
+
+        self.stdout.write(
+            f"{options['tasks_per_day']} задач в день, {options['weekly_tasks']} недельных, "
+            f"{options['iterations']} рендеров"
+        )
+        for name, timings in results.items():
+            self.stdout.write(
+                f'{name:36} медиана {statistics.median(timings):7.2f} мс, '
+                f'p95 {statistics.quantiles(timings, n=20)[-1]:7.2f} мс'
+            )
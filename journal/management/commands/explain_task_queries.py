@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+from django.utils import timezone
+
+from journal.models import Task
+
+
+class Command(BaseCommand):
+    help = 'Проверяет по EXPLAIN QUERY PLAN, что горячие запросы к Task идут через свои индексы'
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Проверка планов поддерживается только для SQLite')
+
+        today = timezone.now().date()
+        start_date = today - timedelta(days=today.weekday())
+        end_date = start_date + timedelta(days=6)
+        user_id = 1
+
+        # (имя, запрос, индекс, которым он должен обслуживаться)
+        queries = [
+            ('week_daily_tasks', Task.objects.filter(
+                user_id=user_id, date__range=[start_date, end_date], is_weekly=False
+            ), 'task_user_date_idx'),
+            ('weekly_tasks', Task.objects.filter(
+                user_id=user_id, is_weekly=True, week_start=start_date
+            ), 'task_user_week_start_idx'),
+            ('day_tasks', Task.objects.filter(
+                user_id=user_id, date=start_date
+            ), 'task_user_date_idx'),
+            ('task_list_page', Task.objects.filter(
+                user_id=user_id, date__range=[start_date, end_date]
+            ).filter(
+                Q(date__gt=start_date) | Q(created_at__gt=timezone.now()) | Q(created_at=timezone.now(), id__gt=1)
+            ).order_by('date', 'created_at', 'id')[:201], 'task_user_date_idx'),
+            ('week_done_count', Task.objects.filter(
+                user_id=user_id, date__range=[start_date, end_date], is_done=True
+            ).order_by().values('id'), 'task_user_date_done_idx'),
+        ]
+
+        failed = []
+        for name, queryset, index_name in queries:
+            plan = queryset.explain()
+            table_lines = [line for line in plan.splitlines() if 'journal_task' in line]
+            # Сортировка тоже должна идти по индексу, без временного B-дерева
+            ok = bool(table_lines) and 'TEMP B-TREE' not in plan and all(
+                'SEARCH' in line and index_name in line for line in table_lines
+            )
+            self.stdout.write(f"{'OK  ' if ok else 'FAIL'} {name} -> {index_name}")
+            self.stdout.write('    ' + plan.replace('\n', '\n    '))
+            if not ok:
+                failed.append(name)
+
+        if failed:
+            raise CommandError(f"Запросы не используют ожидаемый индекс: {', '.join(failed)}")
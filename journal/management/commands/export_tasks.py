@@ -0,0 +1,39 @@
+import sys
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from journal.transfer import EXPORT_CHUNK_SIZE, FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    help = 'Выгружает задачи пользователя в NDJSON или CSV потоком, не загружая их в память'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--output', help='Файл для выгрузки (по умолчанию stdout)')
+        parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+                            help='Строк, читаемых из курсора за раз')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"Пользователь {options['username']} не найден")
+
+        output = open(options['output'], 'w', encoding='utf-8', newline='') if options['output'] else sys.stdout
+        started = time.perf_counter()
+        rows = 0
+        try:
+            for line in export_lines(user, options['format'], options['chunk_size']):
+                output.write(line)
+                rows += 1
+        finally:
+            if output is not sys.stdout:
+                output.close()
+
+        if options['format'] == 'csv':
+            rows -= 1  # заголовок
+        elapsed = time.perf_counter() - started
+        self.stderr.write(f'Выгружено задач: {rows} за {elapsed:.2f} с ({rows / max(elapsed, 1e-9):.0f} строк/с)')
@@ -0,0 +1,45 @@
+import sys
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from journal.transfer import FORMATS, IMPORT_BATCH_SIZE, TransferError, import_records, parse_records
+
+
+class Command(BaseCommand):
+    help = 'Загружает задачи пользователя из NDJSON или CSV порциями, каждая порция — одна транзакция'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--format', choices=FORMATS, default='ndjson')
+        parser.add_argument('--input', help='Файл с задачами (по умолчанию stdin)')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--no-dedupe', action='store_true',
+                            help='Не пропускать задачи, которые уже есть в базе')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"Пользователь {options['username']} не найден")
+
+        source = open(options['input'], encoding='utf-8', newline='') if options['input'] else sys.stdin
+        started = time.perf_counter()
+        try:
+            read, created = import_records(
+                user,
+                parse_records(source, options['format']),
+                batch_size=options['batch_size'],
+                dedupe=not options['no_dedupe'],
+            )
+        except TransferError as e:
+            raise CommandError(str(e))
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано {read}, создано {created}, пропущено дублей {read - created} '
+            f'за {elapsed:.2f} с ({read / max(elapsed, 1e-9):.0f} строк/с)'
+        ))
@@ -0,0 +1,68 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Q
+
+from journal.models import DailyStats, Task
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики DailyStats по задачам, порциями пользователей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='Сколько пользователей пересчитывать за одну транзакцию')
+        parser.add_argument('--verify', action='store_true',
+                            help='Только сверить счётчики и вывести расхождения, ничего не меняя')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        verify = options['verify']
+        mismatches = 0
+        rebuilt = 0
+
+        user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+        for offset in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[offset:offset + chunk_size]
+            # Подсчёт и перезапись в одной транзакции: записи, попавшие между
+            # ними, иначе пропали бы из пересчитанной таблицы, а --verify
+            # сравнивал бы счётчики с задачами из разных моментов
+            with transaction.atomic():
+                expected = {
+                    (r['user_id'], r['date']): (r['total'], r['done'])
+                    for r in Task.objects.filter(user_id__in=chunk, is_weekly=False)
+                    .values('user_id', 'date')
+                    .annotate(total=Count('id'), done=Count('id', filter=Q(is_done=True)))
+                    .order_by()
+                }
+
+                if verify:
+                    actual = {
+                        (user_id, date): (total, done)
+                        for user_id, date, total, done in DailyStats.objects.filter(user_id__in=chunk)
+                        .exclude(total=0, done=0)
+                        .values_list('user_id', 'date', 'total', 'done')
+                    }
+                    for key in expected.keys() | actual.keys():
+                        if expected.get(key) != actual.get(key):
+                            mismatches += 1
+                            self.stdout.write(
+                                f'user={key[0]} date={key[1]}: '
+                                f'ожидалось {expected.get(key)}, в DailyStats {actual.get(key)}'
+                            )
+                    continue
+
+                DailyStats.objects.filter(user_id__in=chunk).delete()
+                DailyStats.objects.bulk_create(
+                    [DailyStats(user_id=user_id, date=date, total=total, done=done)
+                     for (user_id, date), (total, done) in expected.items()],
+                    batch_size=1000,
+                )
+            rebuilt += len(expected)
+
+        if verify:
+            if mismatches:
+                raise CommandError(f'Найдено расхождений: {mismatches}')
+            self.stdout.write(self.style.SUCCESS('Счётчики совпадают с задачами'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Пересчитано строк DailyStats: {rebuilt}'))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from journal.search import (
+    check_search_index, missing_search_triggers, rebuild_search_index, restore_search_triggers, search_available
+)
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает полнотекстовый индекс задач (FTS5) из таблицы journal_task'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--optimize', action='store_true',
+                            help='Слить сегменты индекса после пересборки')
+        parser.add_argument('--check', action='store_true',
+                            help='Только проверить, что индекс совпадает с таблицей')
+
+    def handle(self, *args, **options):
+        if not search_available():
+            raise CommandError('Полнотекстовый индекс есть только на SQLite')
+
+        if options['check']:
+            missing = missing_search_triggers()
+            if missing:
+                raise CommandError(
+                    f"Нет триггеров индекса: {', '.join(missing)}. Их вернёт migrate или rebuild_task_search"
+                )
+            try:
+                check_search_index()
+            except DatabaseError as e:
+                raise CommandError(f'Индекс расходится с задачами: {e}')
+            self.stdout.write(self.style.SUCCESS('Индекс совпадает с задачами'))
+            return
+
+        restored = restore_search_triggers()
+        if restored:
+            self.stdout.write(f"Восстановлены триггеры индекса: {', '.join(restored)}")
+        started = time.perf_counter()
+        rebuild_search_index(optimize=options['optimize'])
+        self.stdout.write(self.style.SUCCESS(f'Индекс пересобран за {time.perf_counter() - started:.2f} с'))
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0003_remove_weeklytask_user_task_delete_dailytask_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'date', 'created_at'], name='task_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['user', 'date', 'is_done'], name='task_user_date_done_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_weekly', True)), fields=['user', 'date', 'created_at'], name='task_user_weekly_idx'),
+        ),
+    ]
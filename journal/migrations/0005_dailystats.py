@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_daily_stats(apps, schema_editor):
+    Task = apps.get_model('journal', 'Task')
+    DailyStats = apps.get_model('journal', 'DailyStats')
+
+    rows = Task.objects.filter(is_weekly=False).values('user_id', 'date').annotate(
+        total=Count('id'), done=Count('id', filter=Q(is_done=True))
+    ).order_by()
+    DailyStats.objects.bulk_create(
+        (DailyStats(user_id=r['user_id'], date=r['date'], total=r['total'], done=r['done']) for r in rows),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0004_task_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('pk', models.CompositePrimaryKey('user', 'date', blank=True, editable=False, primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('done', models.PositiveIntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'daily stats',
+            },
+        ),
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
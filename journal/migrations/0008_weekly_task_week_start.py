@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:17
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_week_start(apps, schema_editor):
+    Task = apps.get_model('journal', 'Task')
+
+    batch = []
+    for task in Task.objects.filter(is_weekly=True, week_start__isnull=True).only('id', 'date').iterator(chunk_size=1000):
+        task.week_start = task.date - timedelta(days=task.date.weekday())
+        batch.append(task)
+        if len(batch) >= 1000:
+            Task.objects.bulk_update(batch, ['week_start'])
+            batch = []
+    if batch:
+        Task.objects.bulk_update(batch, ['week_start'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0007_recurring_tasks'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_user_weekly_idx',
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='carried_from',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='carried_to', to='journal.task'),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='week_start',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_week_start, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_weekly', True)), fields=['user', 'week_start', 'created_at'], name='task_user_week_start_idx'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+from django.db import migrations
+
+# Полнотекстовый индекс по названию и описанию задач (FTS5, только SQLite).
+# Таблица external content: текст хранится в journal_task, в индексе — только
+# токены; триггеры поддерживают его при любых INSERT/UPDATE/DELETE, включая
+# bulk_create, queryset.update() и сырой SQL.
+# SQLite без ошибки удаляет триггеры, когда миграция пересоздаёт journal_task
+# (AddField с default, AlterField). После каждого migrate их проверяет и
+# возвращает обработчик post_migrate в journal/signals.py, а
+# rebuild_task_search --check падает, если их нет.
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE journal_task_fts USING fts5(
+        title, description,
+        content='journal_task', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER journal_task_fts_insert AFTER INSERT ON journal_task BEGIN
+        INSERT INTO journal_task_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER journal_task_fts_delete AFTER DELETE ON journal_task BEGIN
+        INSERT INTO journal_task_fts(journal_task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER journal_task_fts_update AFTER UPDATE OF title, description ON journal_task BEGIN
+        INSERT INTO journal_task_fts(journal_task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO journal_task_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO journal_task_fts(journal_task_fts) VALUES ('rebuild')",
+]
+
+DROP_SQL = [
+    'DROP TRIGGER IF EXISTS journal_task_fts_insert',
+    'DROP TRIGGER IF EXISTS journal_task_fts_delete',
+    'DROP TRIGGER IF EXISTS journal_task_fts_update',
+    'DROP TABLE IF EXISTS journal_task_fts',
+]
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in CREATE_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in DROP_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0010_calendar_feed'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
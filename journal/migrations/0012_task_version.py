@@ -0,0 +1,38 @@
+from importlib import import_module
+
+from django.db import migrations, models
+
+task_search = import_module('journal.migrations.0011_task_search')
+
+# SQLite добавляет столбец с default пересозданием journal_task, а вместе со
+# старой таблицей пропадают её триггеры FTS. Индекс по rowid остаётся верным,
+# поэтому достаточно создать триггеры заново
+TRIGGER_SQL = [sql for sql in task_search.CREATE_SQL if 'CREATE TRIGGER' in sql]
+
+
+def restore_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in task_search.DROP_SQL:
+        if 'TRIGGER' in sql:
+            schema_editor.execute(sql)
+    for sql in TRIGGER_SQL:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0011_task_search'),
+    ]
+
+    operations = [
+        # При откате RemoveField тоже пересоздаёт таблицу — триггеры возвращает эта операция
+        migrations.RunPython(migrations.RunPython.noop, restore_search_triggers),
+        migrations.AddField(
+            model_name='task',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.RunPython(restore_search_triggers, migrations.RunPython.noop),
+    ]
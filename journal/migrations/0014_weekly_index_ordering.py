@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0013_task_day_counts_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='task',
+            name='task_user_week_start_idx',
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('is_weekly', True)), fields=['user', 'week_start', 'date', 'created_at'], name='task_user_week_start_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('journal', '0014_weekly_index_ordering'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='taskarchive',
+            index=models.Index(fields=['user', 'date', 'is_weekly', 'is_done'], name='task_archive_day_counts_idx'),
+        ),
+    ]
@@ -1,5 +1,9 @@
+from datetime import timedelta
+
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.utils.dateparse import parse_date
+
 
 class Task(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tasks')
@@ -10,10 +14,191 @@ class Task(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     date = models.DateField()
     is_weekly = models.BooleanField(default=False)  # Флаг для определения недельной задачи
+    week_start = models.DateField(blank=True, null=True)  # Понедельник недели недельной задачи, у дневных пусто
+    carried_from = models.ForeignKey('self', on_delete=models.SET_NULL, blank=True, null=True,
+                                     related_name='carried_to')  # Недельная цель, перенесённая с прошлой недели
+    version = models.PositiveIntegerField(default=1)  # Растёт с каждой записью, ETag/If-Match задачи
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Исходные дата и тип нужны, чтобы сбросить кэш недели, из которой задачу перенесли
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def sync_week_start(self):
+        # Дата строкой приводится к date: после save() её читают сигналы и сериализация
+        if isinstance(self.date, str):
+            self.date = parse_date(self.date)
+        self.week_start = self.date - timedelta(days=self.date.weekday()) if self.is_weekly else None
+
+    def save(self, *args, **kwargs):
+        self.sync_week_start()
+        update_fields = kwargs.get('update_fields')
+        if not self._state.adding:
+            self.version += 1
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = {*update_fields, 'version'}
+        if update_fields is not None and {'date', 'is_weekly'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'week_start'}
+
+        # Счётчики DailyStats обновляются в post_save — в той же транзакции, что и запись задачи
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            return super().delete(*args, **kwargs)
 
     def toggle_done(self):
-        self.is_done = not self.is_done
-        self.save()
+        # Один UPDATE с инверсией флага, остальные столбцы не перезаписываются
+        from .services import toggle_task
+        task = toggle_task(self.user_id, self.pk)
+        self.is_done, self.version, self.updated_at = task.is_done, task.version, task.updated_at
+        self.change_seq = task.change_seq
+        self._loaded_values = task._loaded_values
 
     class Meta:
         ordering = ['date', 'created_at']
+        indexes = [
+            # Задачи дня/недели пользователя в порядке Meta.ordering
+            models.Index(fields=['user', 'date', 'created_at'], name='task_user_date_idx'),
+            # Покрывающий индекс для счётчиков по дням (баллы, карта активности)
+            models.Index(fields=['user', 'date', 'is_weekly', 'is_done'], name='task_user_date_done_idx'),
+            # Недельные задачи составляют малую долю строк — частичный индекс по неделе.
+            # date перед created_at: так индекс отдаёт строки в порядке Meta.ordering
+            # (даты недельных задач внутри одной недели различаются) без сортировки
+            models.Index(
+                fields=['user', 'week_start', 'date', 'created_at'],
+                condition=models.Q(is_weekly=True),
+                name='task_user_week_start_idx',
+            ),
+        ]
+
+
+class DailyStats(models.Model):
+    """
+    Счётчики задач дня: total — всего дневных задач, done — выполненных (баллы).
+    Недельные задачи сюда не входят, как и в баллы дня на странице недели.
+    Поддерживаются инкрементально в journal.stats.
+    """
+    pk = models.CompositePrimaryKey('user', 'date')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    done = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'daily stats'
+
+
+class ChangeSequence(models.Model):
+    """
+    Номер последнего изменения задач пользователя. Растёт на каждую запись,
+    чтобы клиент мог применять ответы локально и замечать пропущенные изменения.
+    updated_at — время последнего изменения, Last-Modified для календарной ленты.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True,
+                                related_name='change_sequence')
+    seq = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class CalendarFeedToken(models.Model):
+    """Секрет в адресе iCalendar-ленты: календари ходят без сессии и пароля."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True,
+                                related_name='calendar_feed_token')
+    token = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+
+class RecurringTask(models.Model):
+    """
+    Правило повторения задачи. Вхождения не хранятся, а разворачиваются
+    для запрошенной недели (journal.recurrence); отметки и правки отдельных
+    вхождений лежат в RecurrenceException.
+    """
+    DAILY = 'daily'
+    WEEKDAYS = 'weekdays'
+    EVERY_N_DAYS = 'every_n_days'
+    WEEKLY = 'weekly'
+    FREQUENCY_CHOICES = [
+        (DAILY, 'Каждый день'),
+        (WEEKDAYS, 'По будням'),
+        (EVERY_N_DAYS, 'Каждые N дней'),
+        (WEEKLY, 'По дням недели'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recurring_tasks')
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True, null=True)
+    frequency = models.CharField(max_length=16, choices=FREQUENCY_CHOICES)
+    interval = models.PositiveSmallIntegerField(default=1)  # Для every_n_days
+    weekdays = models.PositiveSmallIntegerField(default=0)  # Для weekly: битовая маска, Пн = 1, Вт = 2, ..., Вс = 64
+    start_date = models.DateField()
+    end_date = models.DateField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def occurs_on(self, date):
+        if date < self.start_date or (self.end_date and date > self.end_date):
+            return False
+        if self.frequency == self.DAILY:
+            return True
+        if self.frequency == self.WEEKDAYS:
+            return date.weekday() < 5
+        if self.frequency == self.EVERY_N_DAYS:
+            return (date - self.start_date).days % max(self.interval, 1) == 0
+        if self.frequency == self.WEEKLY:
+            return bool(self.weekdays & (1 << date.weekday()))
+        return False
+
+    class Meta:
+        ordering = ['created_at']
+
+
+class RecurrenceException(models.Model):
+    """Отметка или правка одного вхождения повторяющейся задачи."""
+    rule = models.ForeignKey(RecurringTask, on_delete=models.CASCADE, related_name='exceptions')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recurrence_exceptions')
+    date = models.DateField()
+    is_done = models.BooleanField(default=False)
+    is_skipped = models.BooleanField(default=False)  # Вхождение удалено
+    title = models.CharField(max_length=200, blank=True, null=True)
+    description = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['rule', 'date'], name='recurrence_exception_rule_date_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'date'], name='recurrence_exc_user_date_idx'),
+        ]
+
+
+class TaskArchive(models.Model):
+    """
+    Выполненные задачи старше JOURNAL_ARCHIVE_AFTER_WEEKS, перенесённые из Task
+    (journal.archive), чтобы рабочая таблица и её индексы оставались маленькими.
+    id совпадает с id исходной задачи.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_tasks')
+    title = models.CharField(max_length=200)
+    description = models.TextField(blank=True, null=True)
+    is_done = models.BooleanField(default=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    date = models.DateField()
+    is_weekly = models.BooleanField(default=False)
+    week_start = models.DateField(blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-date', '-id']
+        indexes = [
+            models.Index(fields=['user', 'date', 'id'], name='task_archive_user_date_idx'),
+            # Покрывающий индекс для счётчиков по дням (карта активности)
+            models.Index(fields=['user', 'date', 'is_weekly', 'is_done'], name='task_archive_day_counts_idx'),
+        ]
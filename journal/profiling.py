@@ -0,0 +1,218 @@
+"""
+Профилирование запросов: число и время SQL, время рендера шаблона и всего
+запроса. Итоги уходят в заголовок Server-Timing и в гистограммы по маршрутам,
+которые отдаёт /metrics в текстовом формате Prometheus. Гистограммы живут в
+памяти процесса — каждый воркер отдаёт свои.
+
+Включается ProfilingMiddleware и долей запросов JOURNAL_PROFILING_SAMPLE_RATE:
+при 0 middleware сразу передаёт запрос дальше, а обёртка SQL только проверяет,
+что профиль не задан.
+"""
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.signals import request_started
+from django.db import connections
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+# Профиль текущего запроса; contextvar переходит и в потоки sync_to_async
+_current_profile = ContextVar('journal_request_profile', default=None)
+
+
+class RequestProfile:
+    __slots__ = ('started', 'queries', 'db_time', 'template_started', 'template_time')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.template_started = None
+        self.template_time = 0.0
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries += 1
+        profile.db_time += time.perf_counter() - started
+
+
+def _install_query_wrappers(**kwargs):
+    """
+    То же, что connection.execute_wrapper(), но на всё время жизни соединений
+    потока. request_started под ASGI приходит в тот же поток sync_to_async,
+    где выполняются запросы ORM, поэтому учитываются и они.
+    """
+    for connection in connections.all():
+        if _record_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(_record_query)
+
+
+class Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+def _label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{name}="{_label_value(value)}"' for name, value in labels.items())
+
+
+class MetricsRegistry:
+    HISTOGRAMS = {
+        'journal_request_duration_seconds': ('Время обработки запроса', DURATION_BUCKETS),
+        'journal_request_db_queries': ('SQL-запросов на запрос', QUERY_BUCKETS),
+        'journal_request_db_duration_seconds': ('Время SQL на запрос', DURATION_BUCKETS),
+        'journal_request_template_duration_seconds': ('Время рендера шаблона', DURATION_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._requests = {}
+
+    def observe(self, route, method, status, profile, total):
+        key = (route, method)
+        with self._lock:
+            histograms = self._histograms.get(key)
+            if histograms is None:
+                histograms = self._histograms[key] = {
+                    name: Histogram(buckets) for name, (_, buckets) in self.HISTOGRAMS.items()
+                }
+            histograms['journal_request_duration_seconds'].observe(total)
+            histograms['journal_request_db_queries'].observe(profile.queries)
+            histograms['journal_request_db_duration_seconds'].observe(profile.db_time)
+            if profile.template_started is not None:
+                histograms['journal_request_template_duration_seconds'].observe(profile.template_time)
+            status_key = (route, method, status)
+            self._requests[status_key] = self._requests.get(status_key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self._requests.clear()
+
+    def render(self):
+        with self._lock:
+            lines = [
+                '# HELP journal_requests_total Профилированных запросов',
+                '# TYPE journal_requests_total counter',
+            ]
+            for (route, method, status), count in sorted(self._requests.items()):
+                lines.append(f'journal_requests_total{{{_labels(route=route, method=method, status=status)}}} {count}')
+
+            for name, (help_text, _) in self.HISTOGRAMS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (route, method), histograms in sorted(self._histograms.items()):
+                    histogram = histograms[name]
+                    if not histogram.count:
+                        continue
+                    labels = _labels(route=route, method=method)
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.6f}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics_registry = MetricsRegistry()
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'JOURNAL_PROFILING_SAMPLE_RATE', 0.0)
+        if self.sample_rate > 0:
+            request_started.connect(_install_query_wrappers, dispatch_uid='journal_profiling')
+        # Как в MiddlewareMixin: режим определяется один раз, а не на каждый запрос
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        return self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_profile.reset(token)
+        return self.finish(request, response, profile)
+
+    def process_template_response(self, request, response):
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.template_started = time.perf_counter()
+
+            def rendered(response):
+                profile.template_time += time.perf_counter() - profile.template_started
+
+            response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, profile):
+        total = time.perf_counter() - profile.started
+        match = getattr(request, 'resolver_match', None)
+        # Шаблон маршрута, а не путь: /api/tasks/<int:task_id>/ — одна серия на все задачи
+        route = '/' + match.route if match is not None else 'unmatched'
+        metrics_registry.observe(route, request.method, response.status_code, profile, total)
+
+        timings = [f'db;dur={profile.db_time * 1000:.2f};desc="{profile.queries} queries"']
+        if profile.template_started is not None:
+            timings.append(f'tpl;dur={profile.template_time * 1000:.2f}')
+        timings.append(f'total;dur={total * 1000:.2f}')
+        response['Server-Timing'] = ', '.join(timings)
+        return response
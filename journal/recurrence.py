@@ -0,0 +1,123 @@
+import re
+from datetime import timedelta
+
+from django.utils.dateparse import parse_date
+
+from .models import RecurringTask
+
+OCCURRENCE_ID_RE = re.compile(r'^r(?P<rule_id>\d+)-(?P<date>\d{4}-\d{2}-\d{2})$')
+WEEKDAY_BITS = [1 << i for i in range(7)]
+
+
+class Occurrence:
+    """
+    Виртуальное вхождение правила на конкретную дату. Повторяет атрибуты Task,
+    которые читают шаблон и сериализация, поэтому вхождения лежат в списках
+    задач дня вперемешку с обычными задачами.
+    """
+    is_weekly = False
+    is_recurring = True
+
+    def __init__(self, rule, date, exception=None):
+        self.rule_id = rule.id
+        self.user_id = rule.user_id
+        self.id = occurrence_id(rule.id, date)
+        self.date = date
+        self.title = rule.title
+        self.description = rule.description
+        self.is_done = False
+        self.created_at = rule.created_at
+        self.updated_at = rule.updated_at
+
+        if exception is not None:
+            self.is_done = exception.is_done
+            if exception.title:
+                self.title = exception.title
+            if exception.description is not None:
+                self.description = exception.description
+            self.updated_at = max(self.updated_at, exception.updated_at)
+
+
+def occurrence_id(rule_id, date):
+    return f'r{rule_id}-{date.isoformat()}'
+
+
+def parse_occurrence_id(value):
+    match = OCCURRENCE_ID_RE.match(value)
+    if not match:
+        return None, None
+    return int(match['rule_id']), parse_date(match['date'])
+
+
+def weekdays_to_mask(weekdays):
+    return sum(WEEKDAY_BITS[day] for day in set(weekdays))
+
+
+def mask_to_weekdays(mask):
+    return [day for day, bit in enumerate(WEEKDAY_BITS) if mask & bit]
+
+
+def expand_occurrences(rules, exceptions, start_date, end_date):
+    """Разворачивает правила в вхождения на [start_date, end_date] с учётом исключений."""
+    exceptions_by_key = {(e.rule_id, e.date): e for e in exceptions}
+    occurrences = []
+
+    for rule in rules:
+        if rule.start_date > end_date or (rule.end_date and rule.end_date < start_date):
+            continue
+        date = max(start_date, rule.start_date)
+        while date <= end_date:
+            if rule.occurs_on(date):
+                exception = exceptions_by_key.get((rule.id, date))
+                if exception is None or not exception.is_skipped:
+                    occurrences.append(Occurrence(rule, date, exception))
+            date += timedelta(days=1)
+
+    return occurrences
+
+
+def serialize_rule(rule):
+    return {
+        'id': rule.id,
+        'title': rule.title,
+        'description': rule.description,
+        'frequency': rule.frequency,
+        'interval': rule.interval,
+        'weekdays': mask_to_weekdays(rule.weekdays),
+        'start_date': rule.start_date.isoformat(),
+        'end_date': rule.end_date.isoformat() if rule.end_date else None,
+    }
+
+
+def rule_from_data(rule, data):
+    """Заполняет правило из JSON запроса; возвращает текст ошибки или None."""
+    rule.title = data.get('title', rule.title)
+    rule.description = data.get('description', rule.description)
+    rule.frequency = data.get('frequency', rule.frequency)
+    rule.interval = data.get('interval', rule.interval)
+    if 'weekdays' in data:
+        if not all(isinstance(day, int) and 0 <= day <= 6 for day in data['weekdays']):
+            return 'Дни недели задаются числами от 0 (Пн) до 6 (Вс)'
+        rule.weekdays = weekdays_to_mask(data['weekdays'])
+    try:
+        if 'start_date' in data:
+            rule.start_date = parse_date(str(data['start_date']))
+        if 'end_date' in data:
+            rule.end_date = parse_date(str(data['end_date'])) if data['end_date'] else None
+    except ValueError:
+        # parse_date бросает ValueError на несуществующих датах вроде 2024-13-01
+        return 'Неверный формат даты'
+
+    if not rule.title:
+        return 'Название задачи обязательно'
+    if rule.frequency not in dict(RecurringTask.FREQUENCY_CHOICES):
+        return 'Неизвестная периодичность'
+    if not rule.start_date:
+        return 'Дата начала обязательна'
+    if rule.end_date and rule.end_date < rule.start_date:
+        return 'Дата окончания раньше даты начала'
+    if rule.frequency == RecurringTask.EVERY_N_DAYS and (not isinstance(rule.interval, int) or rule.interval < 1):
+        return 'Интервал должен быть положительным числом'
+    if rule.frequency == RecurringTask.WEEKLY and not rule.weekdays:
+        return 'Для еженедельной задачи нужны дни недели'
+    return None
@@ -0,0 +1,138 @@
+import re
+from importlib import import_module
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.utils.html import escape
+
+FTS_TABLE = 'journal_task_fts'
+# Триггеры из миграции 0011, которые держат индекс в согласии с journal_task
+SEARCH_TRIGGERS = ('journal_task_fts_insert', 'journal_task_fts_delete', 'journal_task_fts_update')
+SEARCH_PAGE_SIZE = 50
+SNIPPET_TOKENS = 12
+# Вес совпадения в названии относительно описания для bm25
+TITLE_WEIGHT = 5.0
+# Маркеры подсветки внутри snippet(): управляющие символы не встречаются в
+# тексте задач, поэтому после экранирования HTML их можно заменить на <mark>
+MARK_START, MARK_END = '\x02', '\x03'
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class SearchError(Exception):
+    pass
+
+
+def search_available():
+    return connection.vendor == 'sqlite'
+
+
+def fts_query(text):
+    """
+    Запрос пользователя в синтаксис MATCH: каждое слово — префиксный токен в
+    кавычках, слова через AND. Операторы FTS5 из ввода не пропускаем, чтобы
+    кавычка или дефис не превращались в синтаксическую ошибку.
+    """
+    tokens = TOKEN_RE.findall(text)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _highlight(snippet):
+    return escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+
+
+def search_tasks(user, text, cursor=None, limit=SEARCH_PAGE_SIZE):
+    """
+    Задачи пользователя по релевантности bm25 с подсветкой совпадений.
+    Курсор — (rank, id) последней выданной строки: следующая страница
+    продолжается с того же места без OFFSET. Возвращает (строки, курсор).
+    """
+    if not search_available():
+        raise SearchError('Полнотекстовый поиск доступен только на SQLite')
+    match = fts_query(text)
+    if not match:
+        raise SearchError('Пустой поисковый запрос')
+
+    rank = f'bm25({FTS_TABLE}, {TITLE_WEIGHT}, 1.0)'
+    params = [MARK_START, MARK_END, SNIPPET_TOKENS, MARK_START, MARK_END, SNIPPET_TOKENS, match, user.pk]
+    keyset = ''
+    if cursor is not None:
+        keyset = f'AND ({rank} > %s OR ({rank} = %s AND t.id > %s))'
+        params += [cursor[0], cursor[0], cursor[1]]
+
+    sql = f"""
+        SELECT t.id, t.title, t.description, t.date, t.is_done, t.is_weekly, {rank} AS rank,
+               snippet({FTS_TABLE}, 0, %s, %s, '…', %s),
+               snippet({FTS_TABLE}, 1, %s, %s, '…', %s)
+        FROM {FTS_TABLE}
+        JOIN journal_task t ON t.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH %s AND t.user_id = %s {keyset}
+        ORDER BY rank, t.id
+        LIMIT %s
+    """
+    params.append(limit + 1)
+
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(sql, params)
+        rows = db_cursor.fetchall()
+
+    results = [
+        {
+            'id': task_id,
+            'title': title,
+            'description': description,
+            'date': str(date),
+            'is_done': bool(is_done),
+            'is_weekly': bool(is_weekly),
+            'rank': rank_value,
+            'title_snippet': _highlight(title_snippet),
+            'description_snippet': _highlight(description_snippet) if description else '',
+        }
+        for task_id, title, description, date, is_done, is_weekly, rank_value, title_snippet, description_snippet
+        in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        last = results[-1]
+        next_cursor = (last['rank'], last['id'])
+    return results, next_cursor
+
+
+def rebuild_search_index(optimize=False, using=DEFAULT_DB_ALIAS):
+    """Пересобирает индекс из journal_task; optimize сливает сегменты после массовых правок."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        if optimize:
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+
+def check_search_index():
+    """integrity-check FTS5: бросает DatabaseError, если индекс разошёлся с таблицей."""
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('integrity-check', 1)")
+
+
+def missing_search_triggers(using=DEFAULT_DB_ALIAS):
+    """
+    Триггеры индекса, которых нет в базе. SQLite без ошибки удаляет их вместе
+    со старой journal_task, когда миграция пересоздаёт таблицу (AddField
+    с default, AlterField), — после этого правки задач в индекс не попадают.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'journal_task'")
+        present = {name for name, in cursor.fetchall()}
+    return [name for name in SEARCH_TRIGGERS if name not in present]
+
+
+def restore_search_triggers(using=DEFAULT_DB_ALIAS):
+    """Создаёт пропавшие триггеры тем же SQL, что миграция 0011. Возвращает их имена."""
+    db = connections[using]
+    if db.vendor != 'sqlite' or FTS_TABLE not in db.introspection.table_names():
+        return []
+    missing = missing_search_triggers(using)
+    if missing:
+        task_search = import_module('journal.migrations.0011_task_search')
+        with db.cursor() as cursor:
+            for sql in task_search.CREATE_SQL:
+                if any(f'CREATE TRIGGER {name} ' in sql for name in missing):
+                    cursor.execute(sql)
+    return missing
@@ -0,0 +1,104 @@
+"""
+Задачи в JSON API. serialize_task — для уже загруженных объектов (Task,
+TaskArchive, Occurrence), task_rows — для списков прямо из queryset через
+values_list, без экземпляров модели. ?fields= сужает набор полей ответа.
+FastJsonResponse кодирует через orjson, если он установлен.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+from .recurrence import Occurrence
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_encode_default = DjangoJSONEncoder().default
+
+TASK_FIELDS = ('id', 'title', 'description', 'date', 'is_done', 'is_weekly', 'version')
+# Поля, которые можно запросить в ?fields=; recurring_task_id есть только у вхождений
+FIELD_NAMES = TASK_FIELDS + ('recurring_task_id',)
+
+
+def parse_fields(value):
+    """'title,is_done' из ?fields= в кортеж полей; id отдаётся всегда. None — все поля."""
+    if not value:
+        return None
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = requested.difference(FIELD_NAMES)
+    if unknown:
+        raise ValueError(f"Неизвестные поля: {', '.join(sorted(unknown))}")
+    return tuple(name for name in FIELD_NAMES if name == 'id' or name in requested)
+
+
+def serialize_task(task, fields=None):
+    data = {
+        'id': task.id,
+        'title': task.title,
+        'description': task.description,
+        'date': task.date.isoformat(),
+        'is_done': task.is_done,
+        'is_weekly': task.is_weekly
+    }
+    if isinstance(task, Occurrence):
+        data['recurring_task_id'] = task.rule_id
+    elif hasattr(task, 'version'):
+        # У TaskArchive версии нет: архивная задача больше не меняется
+        data['version'] = task.version
+    if fields is not None:
+        data = {name: data[name] for name in fields if name in data}
+    return data
+
+
+def serialize_week(week, fields=None):
+    return {
+        'week_start': week['week_start'].isoformat(),
+        'week_end': week['week_end'].isoformat(),
+        'week_number': week['week_number'],
+        'total_points': week['total_points'],
+        'days': [{
+            'date': day['date'].isoformat(),
+            'day_name': day['day_name'],
+            'today': day['today'],
+            'task_count': day['task_count'],
+            'earned_points': day['earned_points'],
+        } for day in week['days']],
+        # Плоский список дневных задач недели, клиент раскладывает их по дням сам
+        'tasks': [serialize_task(t, fields) for day in week['days'] for t in day['tasks']],
+        'weekly_tasks': [serialize_task(t, fields) for t in week['weekly_tasks']],
+    }
+
+
+def task_rows(queryset, fields=None, extra=()):
+    """
+    Задачи queryset словарями как у serialize_task, но через values_list:
+    выбираются только нужные столбцы и не создаются экземпляры модели.
+    Полей, которых у модели нет (version у архива), в ответе не будет.
+    extra — служебные столбцы (например, для курсора), вызывающий убирает их сам.
+    """
+    columns = {field.name for field in queryset.model._meta.concrete_fields}
+    names = [name for name in TASK_FIELDS if name in (fields or TASK_FIELDS) and name in columns]
+    names += [name for name in extra if name not in names]
+    rows = [dict(zip(names, row)) for row in queryset.values_list(*names)]
+    if 'date' in names:
+        for row in rows:
+            row['date'] = row['date'].isoformat()
+    return rows
+
+
+def dumps(data):
+    """JSON в байтах: orjson, если установлен, иначе json с DjangoJSONEncoder."""
+    if orjson is not None:
+        return orjson.dumps(data, default=_encode_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, cls=DjangoJSONEncoder).encode()
+
+
+class FastJsonResponse(HttpResponse):
+    """JsonResponse для больших ответов API: тело кодирует dumps()."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data), **kwargs)
@@ -0,0 +1,605 @@
+import hashlib
+from datetime import datetime, timedelta
+from datetime import timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.http import parse_etags, quote_etag
+
+from .cache import (
+    WEEK_CACHE_TIMEOUT, asnapshot_keys, day_tasks_key, get_week_cache, heatmap_key, invalidate_task,
+    recurrence_exceptions_key, recurring_rules_key, snapshot_keys, week_cache_stats, weekly_tasks_key
+)
+from .events import publish_event
+from .models import RecurrenceException, RecurringTask, Task
+from .recurrence import expand_occurrences
+from .serializers import serialize_task, task_rows
+from .stats import bump_change_seq, get_change_seq, get_day_counts, record_task_change, task_state
+
+DAY_NAMES = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
+
+BATCH_MAX_OPERATIONS = 500
+BATCH_UPDATE_FIELDS = ('title', 'description', 'is_done', 'is_weekly', 'week_start', 'updated_at')
+TASK_UPDATE_FIELDS = ('title', 'description', 'is_done', 'is_weekly')
+
+HEATMAP_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+TASK_LIST_PAGE_SIZE = 200
+TASK_CURSOR_TIME_FORMAT = '%Y%m%dT%H%M%S%f'
+
+
+def get_week_range(week_offset=0, today=None):
+    today = today or timezone.now().date()
+    start_date = today - timedelta(days=today.weekday()) + timedelta(weeks=week_offset)
+    end_date = start_date + timedelta(days=6)
+    return start_date, end_date
+
+
+def day_tasks_queryset(user, start_date):
+    return Task.objects.filter(
+        user=user,
+        date__range=[start_date, start_date + timedelta(days=6)],
+        is_weekly=False
+    )
+
+
+def weekly_tasks_queryset(user, start_date):
+    return Task.objects.filter(user=user, is_weekly=True, week_start=start_date)
+
+
+def recurring_rules_queryset(user):
+    return RecurringTask.objects.filter(user=user)
+
+
+def recurrence_exceptions_queryset(user, start_date):
+    return RecurrenceException.objects.filter(
+        user=user, date__range=[start_date, start_date + timedelta(days=6)]
+    )
+
+
+def fetch_day_tasks(user, start_date):
+    return list(day_tasks_queryset(user, start_date))
+
+
+def fetch_weekly_tasks(user, start_date):
+    return list(weekly_tasks_queryset(user, start_date))
+
+
+def fetch_recurring_rules(user):
+    return list(recurring_rules_queryset(user))
+
+
+def fetch_recurrence_exceptions(user, start_date):
+    return list(recurrence_exceptions_queryset(user, start_date))
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+def rows_version(tasks):
+    """
+    Версия набора задач для ключей кэша фрагментов: последняя правка меняет
+    max(updated_at), удаление — количество строк.
+    """
+    last_modified = max((t.updated_at for t in tasks), default=None)
+    return f"{last_modified.timestamp() if last_modified else 0}-{len(tasks)}"
+
+
+def assemble_week(start_date, day_tasks, weekly_tasks, today=None, rules=(), exceptions=()):
+    """
+    Группирует уже загруженные задачи недели по дням и считает баллы в Python.
+    Вхождения повторяющихся задач разворачиваются здесь же и идут вместе с задачами дня.
+    """
+    today = today or timezone.now().date()
+    end_date = start_date + timedelta(days=6)
+
+    tasks_by_date = {start_date + timedelta(days=i): [] for i in range(7)}
+    for task in day_tasks:
+        tasks_by_date[task.date].append(task)
+
+    occurrences = expand_occurrences(rules, exceptions, start_date, end_date)
+    if occurrences:
+        for occurrence in occurrences:
+            tasks_by_date[occurrence.date].append(occurrence)
+        for tasks in tasks_by_date.values():
+            tasks.sort(key=lambda t: t.created_at)
+
+    days = []
+    total_points = 0
+    for i, (date, tasks) in enumerate(tasks_by_date.items()):
+        earned_points = sum(1 for t in tasks if t.is_done)
+        total_points += earned_points
+        days.append({
+            'date': date,
+            'day_name': DAY_NAMES[i],
+            'today': date == today,
+            'tasks': tasks,
+            'task_count': len(tasks),
+            'earned_points': earned_points,
+            'version': rows_version(tasks),
+        })
+
+    # Выполненные недельные задачи недели тоже дают баллы
+    total_points += sum(1 for t in weekly_tasks if t.is_done)
+
+    return {
+        'days': days,
+        'weekly_tasks': weekly_tasks,
+        'week_start': start_date,
+        'week_end': end_date,
+        'week_number': start_date.isocalendar()[1],
+        'total_points': total_points,
+        'today': today,
+        'weekly_version': rows_version(weekly_tasks),
+    }
+
+
+def build_week(user, start_date, today=None):
+    """
+    Собирает неделю пользователя без кэша: по одной выборке дневных задач за 7 дней,
+    недельных задач этой недели, правил повторения и исключений недели.
+    """
+    return assemble_week(
+        start_date, fetch_day_tasks(user, start_date), fetch_weekly_tasks(user, start_date), today,
+        fetch_recurring_rules(user), fetch_recurrence_exceptions(user, start_date)
+    )
+
+
+def _week_loaders(user, start_date):
+    """Ключи кэша недели и querysets, которыми они заполняются при промахе."""
+    return {
+        day_tasks_key(user.pk, start_date): day_tasks_queryset(user, start_date),
+        weekly_tasks_key(user.pk, start_date): weekly_tasks_queryset(user, start_date),
+        recurring_rules_key(user.pk): recurring_rules_queryset(user),
+        recurrence_exceptions_key(user.pk, start_date): recurrence_exceptions_queryset(user, start_date),
+    }
+
+
+def get_week(user, start_date, today=None):
+    """
+    Неделя пользователя из кэша. Снимок хранится несколькими записями — дневные
+    и недельные задачи недели, правила повторения пользователя и исключения
+    недели — и читается одним get_many, поэтому при попадании запросов к БД нет.
+    """
+    week_cache = get_week_cache()
+    loaders = _week_loaders(user, start_date)
+    # Поколения ключей — до выборок из БД (см. journal.cache.snapshot_keys)
+    keys = snapshot_keys(week_cache, list(loaders))
+
+    found = week_cache.get_many(list(keys.values()))
+    missing = {keys[key]: list(queryset) for key, queryset in loaders.items() if keys[key] not in found}
+    if missing:
+        week_cache.set_many(missing, getattr(settings, 'JOURNAL_WEEK_CACHE_TIMEOUT', WEEK_CACHE_TIMEOUT))
+    week_cache_stats.record(hits=len(found), misses=len(missing))
+
+    snapshot = {**found, **missing}
+    day_tasks, weekly_tasks, rules, exceptions = (snapshot[keys[key]] for key in loaders)
+    return assemble_week(start_date, day_tasks, weekly_tasks, today, rules, exceptions)
+
+
+async def aget_week(user, start_date, today=None):
+    """get_week для async view: кэш и выборки через aget_many/async for."""
+    week_cache = get_week_cache()
+    loaders = _week_loaders(user, start_date)
+    keys = await asnapshot_keys(week_cache, list(loaders))
+
+    found = await week_cache.aget_many(list(keys.values()))
+    missing = {keys[key]: await _alist(queryset) for key, queryset in loaders.items() if keys[key] not in found}
+    if missing:
+        await week_cache.aset_many(missing, getattr(settings, 'JOURNAL_WEEK_CACHE_TIMEOUT', WEEK_CACHE_TIMEOUT))
+    week_cache_stats.record(hits=len(found), misses=len(missing))
+
+    snapshot = {**found, **missing}
+    day_tasks, weekly_tasks, rules, exceptions = (snapshot[keys[key]] for key in loaders)
+    return assemble_week(start_date, day_tasks, weekly_tasks, today, rules, exceptions)
+
+
+def fragment_cache_context():
+    return {
+        'fragment_cache': getattr(settings, 'JOURNAL_FRAGMENT_CACHE', 'default'),
+        'fragment_cache_timeout': getattr(settings, 'JOURNAL_FRAGMENT_CACHE_TIMEOUT', 60 * 60),
+    }
+
+
+def week_etag(user, week):
+    """
+    ETag недели по max(updated_at) и числу строк: удаление меняет счётчик,
+    создание и правка — метку времени. Считается по уже собранной неделе.
+    """
+    rows = [t for day in week['days'] for t in day['tasks']] + list(week['weekly_tasks'])
+    last_modified = max((t.updated_at for t in rows), default=None)
+    last_modified = last_modified.isoformat() if last_modified else ''
+    raw = f"{user.pk}:{week['week_start']}:{week['today']}:{last_modified}:{len(rows)}"
+    return hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+
+
+def heatmap_period(year=None, month=None, today=None):
+    """(period, начало, конец) по ?month=2024-05 или ?year=2024; по умолчанию текущий год."""
+    if month:
+        start_date = parse_date(f'{month}-01')
+        if start_date is None:
+            raise ValueError('month должен быть в формате ГГГГ-ММ')
+        end_date = (start_date + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+        return f'{start_date:%Y-%m}', start_date, end_date
+    year = int(year) if year else (today or timezone.now().date()).year
+    start_date = datetime(year, 1, 1).date()
+    return f'{start_date:%Y}', start_date, start_date.replace(month=12, day=31)
+
+
+def get_heatmap(user, year=None, month=None, today=None):
+    """
+    Счётчики задач по дням месяца или года для карты активности. Закрытые
+    периоды берутся из кэша недель — их сбрасывает invalidate_weeks при правке
+    задачи с датой внутри; текущий и будущие периоды считаются заново.
+    """
+    today = today or timezone.now().date()
+    period, start_date, end_date = heatmap_period(year, month, today)
+    closed = end_date < today
+    cache = get_week_cache()
+
+    days = None
+    if closed:
+        key = heatmap_key(user.pk, period)
+        # Поколение ключа — до подсчёта (см. journal.cache.snapshot_keys)
+        key = snapshot_keys(cache, [key])[key]
+        days = cache.get(key)
+    if days is None:
+        days = {
+            date.isoformat(): {'total': total, 'done': done}
+            for date, (total, done) in get_day_counts(user.pk, start_date, end_date).items()
+        }
+        if closed:
+            cache.set(key, days, getattr(settings, 'JOURNAL_HEATMAP_CACHE_TIMEOUT', HEATMAP_CACHE_TIMEOUT))
+
+    return {
+        'period': period,
+        'from': start_date.isoformat(),
+        'to': end_date.isoformat(),
+        'days': days,
+    }
+
+
+def encode_task_cursor(task_date, created_at, task_id):
+    """Курсор "дата:created_at:id" — без символов, которые надо экранировать в URL."""
+    return f'{task_date}:{created_at.astimezone(dt_timezone.utc).strftime(TASK_CURSOR_TIME_FORMAT)}:{task_id}'
+
+
+def parse_task_cursor(value):
+    try:
+        task_date, created_at, task_id = value.split(':')
+        task_date = parse_date(task_date)
+        created_at = datetime.strptime(created_at, TASK_CURSOR_TIME_FORMAT).replace(tzinfo=dt_timezone.utc)
+        task_id = int(task_id)
+    except ValueError:
+        task_date = None
+    if task_date is None:
+        raise ValueError('Неверный курсор')
+    return task_date, created_at, task_id
+
+
+def list_tasks(user, date_from=None, date_to=None, is_done=None, is_weekly=None, cursor=None,
+               limit=TASK_LIST_PAGE_SIZE, fields=None):
+    """
+    Страница задач в порядке Task.Meta.ordering, id — для однозначности.
+    Курсор — ключ (date, created_at, id) последней выданной строки: следующая
+    страница начинается с позиции в task_user_date_idx, а не с OFFSET, поэтому
+    глубокие страницы стоят столько же, сколько первая. Возвращает (строки, курсор).
+    """
+    tasks = Task.objects.filter(user=user)
+    if date_from is not None:
+        tasks = tasks.filter(date__gte=date_from)
+    if date_to is not None:
+        tasks = tasks.filter(date__lte=date_to)
+    if is_done is not None:
+        tasks = tasks.filter(is_done=is_done)
+    if is_weekly is not None:
+        tasks = tasks.filter(is_weekly=is_weekly)
+    if cursor is not None:
+        cursor_date, created_at, task_id = cursor
+        # date >= даты курсора задаёт начало диапазона индекса, OR отсекает уже выданное внутри дня
+        tasks = tasks.filter(date__gte=cursor_date).filter(
+            Q(date__gt=cursor_date) | Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=task_id)
+        )
+
+    limit = max(1, min(limit, TASK_LIST_PAGE_SIZE))
+    if fields is not None:
+        # Курсор строится из date и id, поэтому они выбираются при любом ?fields=
+        fields = (*fields, 'date')
+    rows = task_rows(tasks.order_by('date', 'created_at', 'id')[:limit + 1], fields, extra=('created_at',))
+    created = [row.pop('created_at') for row in rows]
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_task_cursor(rows[-1]['date'], created[limit - 1], rows[-1]['id'])
+    return rows, next_cursor
+
+
+class BatchError(Exception):
+    pass
+
+
+def _batch_task_id(op):
+    try:
+        return int(op.get('id'))
+    except (TypeError, ValueError):
+        return None
+
+
+def _batch_operation_error(index, op, message):
+    return {'index': index, 'op': op, 'status': 'error', 'error': message}
+
+
+def apply_task_batch(user, operations):
+    """
+    Применяет упорядоченный список операций create/update/delete/toggle.
+    Операции разыгрываются над объектами в памяти (по одному SELECT на все
+    затронутые задачи), затем записываются в той же транзакции: bulk_create,
+    а правки и удаления — условно, WHERE version = прочитанной версии.
+    Задачи, которые успели изменить другим запросом, не перезаписываются:
+    их операции возвращаются со статусом conflict и текущей задачей.
+    Ошибочные операции не прерывают пакет и возвращаются в результатах.
+    Возвращает результаты операций и новый номер изменений пользователя.
+    """
+    if not isinstance(operations, list):
+        raise BatchError('Поле operations должно быть списком')
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        raise BatchError(f'Не больше {BATCH_MAX_OPERATIONS} операций за запрос')
+
+    task_ids = {
+        _batch_task_id(op) for op in operations if isinstance(op, dict)
+    } - {None}
+
+    results = []
+    created, changed, deleted = [], {}, set()
+    # Номера операций над каждой задачей: при конфликте отменяются все
+    touched = {}
+    now = timezone.now()
+
+    with transaction.atomic():
+        tasks = Task.objects.filter(user=user).in_bulk(task_ids) if task_ids else {}
+        versions = {task_id: task.version for task_id, task in tasks.items()}
+
+        for index, op in enumerate(operations):
+            if not isinstance(op, dict):
+                results.append(_batch_operation_error(index, None, 'Операция должна быть объектом'))
+                continue
+
+            kind = op.get('op')
+            data = op.get('data') or {}
+            if not isinstance(data, dict):
+                results.append(_batch_operation_error(index, kind, 'Поле data должно быть объектом'))
+                continue
+
+            if kind == 'create':
+                if not data.get('title'):
+                    results.append(_batch_operation_error(index, kind, 'Название задачи обязательно'))
+                    continue
+                if not data.get('date'):
+                    results.append(_batch_operation_error(index, kind, 'Дата задачи обязательна'))
+                    continue
+                try:
+                    # parse_date бросает ValueError на несуществующих датах вроде 2024-13-45
+                    date = parse_date(str(data['date']))
+                except ValueError:
+                    date = None
+                if date is None:
+                    results.append(_batch_operation_error(index, kind, 'Неверная дата задачи'))
+                    continue
+                task = Task(
+                    user=user,
+                    title=data['title'],
+                    description=data.get('description', ''),
+                    date=date,
+                    is_done=data.get('is_done', False),
+                    is_weekly=data.get('is_weekly', False),
+                )
+                task.sync_week_start()
+                created.append(task)
+                # id станет известен после bulk_create
+                results.append({'index': index, 'op': kind, 'status': 'created', 'task': task})
+                continue
+
+            if kind not in ('update', 'delete', 'toggle'):
+                results.append(_batch_operation_error(index, kind, 'Неизвестная операция'))
+                continue
+
+            task_id = _batch_task_id(op)
+            task = tasks.get(task_id)
+            if task is None or task_id in deleted:
+                results.append(_batch_operation_error(index, kind, 'Задача не найдена'))
+                continue
+            touched.setdefault(task_id, []).append(index)
+
+            if kind == 'delete':
+                deleted.add(task_id)
+                changed.pop(task_id, None)
+                results.append({'index': index, 'op': kind, 'status': 'deleted', 'id': task_id})
+                continue
+
+            if kind == 'toggle':
+                task.is_done = not task.is_done
+            else:
+                task.title = data.get('title', task.title)
+                task.description = data.get('description', task.description)
+                task.is_done = data.get('is_done', task.is_done)
+                task.is_weekly = data.get('is_weekly', task.is_weekly)
+                task.sync_week_start()
+            task.updated_at = now
+            if task_id not in changed:
+                task.version += 1
+            changed[task_id] = task
+            results.append({'index': index, 'op': kind, 'status': 'updated', 'task': serialize_task(task)})
+
+        if created:
+            Task.objects.bulk_create(created)
+
+        conflicts = set()
+        for task_id in deleted:
+            # Счётчики и кэш удалённых задач обновляет post_delete
+            if not Task.objects.filter(id=task_id, user=user, version=versions[task_id]).delete()[0]:
+                conflicts.add(task_id)
+        for task_id, task in list(changed.items()):
+            updated = Task.objects.filter(id=task_id, user=user, version=versions[task_id]).update(
+                **{field: getattr(task, field) for field in BATCH_UPDATE_FIELDS}, version=F('version') + 1
+            )
+            if not updated:
+                conflicts.add(task_id)
+                del changed[task_id]
+
+        if conflicts:
+            current = Task.objects.filter(user=user).in_bulk(conflicts)
+            for task_id in conflicts:
+                for index in touched[task_id]:
+                    if task_id in current:
+                        results[index] = {
+                            'index': index, 'op': results[index]['op'], 'status': 'conflict',
+                            'error': 'Задача изменена другим запросом', 'task': serialize_task(current[task_id]),
+                        }
+                    else:
+                        results[index] = _batch_operation_error(index, results[index]['op'], 'Задача не найдена')
+
+        # bulk_create и queryset.update() не шлют post_save: счётчики и кэш недель обновляем сами
+        for task in created:
+            record_task_change(task, None, task_state(task))
+            invalidate_task(task)
+        for task in changed.values():
+            record_task_change(task, task_state(task, loaded=True), task_state(task))
+            invalidate_task(task)
+
+        # Удаления уже учтены сигналами post_delete
+        if created or changed:
+            change_seq = bump_change_seq(user.pk, len(created) + len(changed))
+        else:
+            change_seq = get_change_seq(user.pk)
+
+        # Удалённые задачи публикует post_delete
+        for task in created:
+            publish_event(user.pk, 'task.created', serialize_task(task), change_seq)
+        for task in changed.values():
+            publish_event(user.pk, 'task.updated', serialize_task(task), change_seq)
+
+    for result in results:
+        if result['status'] == 'created':
+            result['task'] = serialize_task(result['task'])
+
+    return results, change_seq
+
+
+class TaskConflict(Exception):
+    """Задачу успели изменить: версия в БД не совпала с ожидаемой (If-Match)."""
+
+    def __init__(self, task):
+        super().__init__('Задача изменена другим запросом')
+        self.task = task
+
+
+def task_etag(task):
+    return quote_etag(str(task.version))
+
+
+def parse_if_match(header):
+    """Версия задачи из If-Match: None — заголовка нет или «*», ValueError — не версия."""
+    if not header:
+        return None
+    etags = parse_etags(header)
+    if etags == ['*']:
+        return None
+    version = etags[0].removeprefix('W/').strip('"') if len(etags) == 1 else ''
+    if not version.isdigit():
+        raise ValueError('Неверный заголовок If-Match')
+    return int(version)
+
+
+def _task_updated(task, old):
+    # queryset.update() не шлёт post_save — делаем то же, что сигнал task_saved
+    record_task_change(task, old, task_state(task))
+    invalidate_task(task)
+    task.change_seq = bump_change_seq(task.user_id)
+    publish_event(task.user_id, 'task.updated', serialize_task(task), task.change_seq)
+    task._loaded_values = {'date': task.date, 'is_done': task.is_done, 'is_weekly': task.is_weekly}
+
+
+def update_task_fields(user, task_id, data, expected_version=None):
+    """
+    Частичная правка задачи одним UPDATE ... WHERE id AND user_id AND version:
+    пишутся только пришедшие поля, version растёт на единицу. Без expected_version
+    (If-Match) сверяется версия, прочитанная здесь же, — параллельная правка
+    не затирается молча. Бросает Task.DoesNotExist и TaskConflict.
+    """
+    changes = {field: data[field] for field in TASK_UPDATE_FIELDS if field in data}
+    with transaction.atomic():
+        task = Task.objects.get(id=task_id, user=user)
+        old = task_state(task)
+        version = task.version if expected_version is None else expected_version
+
+        for field, value in changes.items():
+            setattr(task, field, value)
+        if 'is_weekly' in changes:
+            task.sync_week_start()
+            changes['week_start'] = task.week_start
+        task.updated_at = timezone.now()
+
+        updated = Task.objects.filter(id=task_id, user=user, version=version).update(
+            **changes, updated_at=task.updated_at, version=F('version') + 1
+        )
+        if not updated:
+            raise TaskConflict(Task.objects.get(id=task_id, user=user))
+        task.version = version + 1
+        _task_updated(task, old)
+    return task
+
+
+def toggle_task(user, task_id, expected_version=None):
+    """
+    Переключает is_done одним UPDATE с инверсией флага в SQL: без чтения перед
+    записью, и два параллельных переключения не теряются. Новое состояние
+    читается уже после записи. Бросает Task.DoesNotExist и TaskConflict.
+    """
+    filters = {'id': task_id, 'user': user}
+    if expected_version is not None:
+        filters['version'] = expected_version
+
+    with transaction.atomic():
+        updated = Task.objects.filter(**filters).update(
+            is_done=Case(When(is_done=True, then=Value(False)), default=Value(True)),
+            updated_at=timezone.now(),
+            version=F('version') + 1,
+        )
+        task = Task.objects.get(id=task_id, user=user)
+        if not updated:
+            raise TaskConflict(task)
+        new = task_state(task)
+        _task_updated(task, new and (new[0], not new[1]))
+    return task
+
+
+def carry_over_weekly_tasks(user, week_start):
+    """
+    Переносит невыполненные недельные цели прошлой недели на неделю week_start.
+    Копия ссылается на исходную задачу через carried_from, поэтому повторный
+    перенос ничего не дублирует. Возвращает созданные задачи.
+    """
+    previous_week = week_start - timedelta(weeks=1)
+    already_carried = Task.objects.filter(
+        user=user, is_weekly=True, week_start=week_start, carried_from__isnull=False
+    ).values('carried_from_id')
+    unfinished = Task.objects.filter(
+        user=user, is_weekly=True, week_start=previous_week, is_done=False
+    ).exclude(id__in=already_carried)
+
+    created = []
+    with transaction.atomic():
+        for task in unfinished:
+            created.append(Task.objects.create(
+                user=user,
+                title=task.title,
+                description=task.description,
+                date=week_start,
+                is_weekly=True,
+                carried_from=task,
+            ))
+    return created
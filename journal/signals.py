@@ -0,0 +1,85 @@
+from django.contrib.auth.models import User
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .auth import invalidate_user
+from .cache import invalidate_recurrence, invalidate_task
+from .events import RESYNC, publish_event
+from .models import RecurrenceException, RecurringTask, Task
+from .search import rebuild_search_index, restore_search_triggers
+from .serializers import serialize_task
+from .stats import bump_change_seq, record_task_change, task_state
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, created, **kwargs):
+    old = None if created else task_state(instance, loaded=True)
+    # Без исходного состояния (например, после .only()) разницу не посчитать —
+    # такие расхождения исправляет rebuild_daily_stats
+    if created or old is not None:
+        record_task_change(instance, old, task_state(instance))
+    instance.change_seq = bump_change_seq(instance.user_id)
+
+    invalidate_task(instance)
+    publish_event(
+        instance.user_id, 'task.created' if created else 'task.updated',
+        serialize_task(instance), instance.change_seq
+    )
+    # Следующее сохранение того же объекта сравнивается уже с текущим состоянием
+    instance._loaded_values = {
+        'date': instance.date, 'is_done': instance.is_done, 'is_weekly': instance.is_weekly
+    }
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, origin=None, **kwargs):
+    invalidate_task(instance)
+
+    # При каскадном удалении пользователя его счётчики удаляются вместе с ним
+    if origin is not None and getattr(origin, 'model', type(origin)) is not Task:
+        return
+
+    old = task_state(instance, loaded=True)
+    if old is None:
+        old = task_state(instance)
+    record_task_change(instance, old, None)
+    instance.change_seq = bump_change_seq(instance.user_id)
+    publish_event(instance.user_id, 'task.deleted', {
+        'id': instance.pk, 'date': str(instance.date), 'is_weekly': instance.is_weekly
+    }, instance.change_seq)
+
+
+@receiver(post_save, sender=RecurringTask)
+@receiver(post_delete, sender=RecurringTask)
+def recurring_task_changed(sender, instance, origin=None, **kwargs):
+    invalidate_recurrence(instance.user_id, rules=True)
+    if origin is None or getattr(origin, 'model', type(origin)) is RecurringTask:
+        # Правило меняет вхождения на многих неделях — клиенту проще перечитать неделю
+        publish_event(instance.user_id, RESYNC, seq=bump_change_seq(instance.user_id))
+
+
+@receiver(post_save, sender=RecurrenceException)
+@receiver(post_delete, sender=RecurrenceException)
+def recurrence_exception_changed(sender, instance, origin=None, **kwargs):
+    invalidate_recurrence(instance.user_id, exception_dates=[instance.date])
+    if origin is None or getattr(origin, 'model', type(origin)) is RecurrenceException:
+        instance.change_seq = bump_change_seq(instance.user_id)
+        publish_event(instance.user_id, RESYNC, seq=instance.change_seq)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # Пароль, is_active, is_staff: закэшированный пользователь запроса устарел
+    invalidate_user(instance.pk)
+
+
+@receiver(post_migrate)
+def search_triggers_migrated(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    if sender.name != 'journal':
+        return
+    # Миграция, пересоздавшая journal_task, молча теряет триггеры FTS: возвращаем
+    # их и пересобираем индекс — правки, сделанные без триггеров, в него не попали
+    if restore_search_triggers(using):
+        rebuild_search_index(using=using)
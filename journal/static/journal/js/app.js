@@ -1,6 +1,7 @@
 import {WeekManager} from './weekManager.js';
 import {TaskManager} from './taskManager.js';
 import {WeeklyTaskManager} from "./weeklyTaskManager.js";
+import {LiveUpdates} from './liveUpdates.js';
 
 class DailyPlannerApp {
     constructor() {
@@ -8,6 +9,7 @@ class DailyPlannerApp {
 
         this.taskManager = new TaskManager(this.weekManager);
         //this.weeklyTaskManager = new WeeklyTaskManager(this.weekManager);
+        this.liveUpdates = new LiveUpdates(this);
 
         this.setupEventListeners();
         this.init();
@@ -0,0 +1,33 @@
+// Изменения задач из других вкладок и устройств по SSE (/api/tasks/events/)
+export class LiveUpdates {
+    constructor(app) {
+        this.app = app;
+        this.taskManager = app.taskManager;
+
+        if (!window.EventSource) return;
+        this.source = new EventSource('/api/tasks/events/');
+        this.source.addEventListener('task.created', (e) => this.onTaskChanged(JSON.parse(e.data)));
+        this.source.addEventListener('task.updated', (e) => this.onTaskChanged(JSON.parse(e.data)));
+        this.source.addEventListener('task.deleted', (e) => this.onTaskDeleted(JSON.parse(e.data)));
+        this.source.addEventListener('resync', () => this.scheduleResync());
+    }
+
+    onTaskChanged(task) {
+        if (task.is_weekly) return;
+
+        // addTaskToDOM сам обновляет уже показанную задачу или переносит её в другой день
+        this.taskManager.addTaskToDOM(task);
+        this.taskManager.updateStatistics();
+    }
+
+    onTaskDeleted(task) {
+        this.taskManager.removeTaskFromDOM(String(task.id));
+        this.taskManager.updateStatistics();
+    }
+
+    scheduleResync() {
+        // Несколько resync подряд (импорт порциями) — одна перезагрузка недели
+        clearTimeout(this.resyncTimer);
+        this.resyncTimer = setTimeout(() => this.app.updateDisplay(), 300);
+    }
+}
@@ -117,6 +117,16 @@ export class TaskManager {
         return await response.json();
     }
 
+    async sendTaskToggle(taskId) {
+        // Флаг переключает сервер одним UPDATE — без чтения задачи и отправки всех полей
+        const response = await fetch(`/api/tasks/${taskId}/toggle/`, {
+            method: 'POST',
+            headers: this.getRequestHeaders()
+        });
+        if (!response.ok) throw new Error('Toggle failed');
+        return await response.json();
+    }
+
     prepareDeleteTask(taskId) {
         this.taskToDelete = taskId;
         document.getElementById('confirm-modal').style.display = 'flex';
@@ -158,8 +168,7 @@ export class TaskManager {
 
     async toggleTaskDone(taskId) {
         try {
-            const task = await this.fetchTask(taskId);
-            const updatedTask = await this.sendTaskUpdate({...task, is_done: !task.is_done});
+            const updatedTask = await this.sendTaskToggle(taskId);
             this.updateTaskInDOM(updatedTask);
             this.updateStatistics();
             showNotification('Задача обновлена!', 'success');
@@ -196,7 +205,7 @@ export class TaskManager {
         const taskElement = document.querySelector(`.task[data-task-id="${taskId}"]`);
         if (taskElement) {
             taskElement.remove();
-            this.allTasks = this.allTasks.filter(t => t.id !== taskId);
+            this.allTasks = this.allTasks.filter(t => String(t.id) !== String(taskId));
         }
     }
 
@@ -237,8 +246,19 @@ export class TaskManager {
     }
 
     addTaskToDOM(task) {
-        const taskElement = this.createTaskElement(task);
         const dayCard = this.findDayCardByDate(task.date);
+        // Задачу уже могло показать событие SSE (или ответ на создание пришёл
+        // после него) — обновляем её на месте, а не рисуем второй раз
+        const existing = document.querySelector(`.task[data-task-id="${task.id}"]`);
+        if (existing) {
+            if (dayCard && existing.closest('.day-card') === dayCard) {
+                this.updateTaskInDOM(task);
+                return;
+            }
+            this.removeTaskFromDOM(String(task.id));
+        }
+
+        const taskElement = this.createTaskElement(task);
 
         if (dayCard) {
             dayCard.querySelector('.task-list').appendChild(taskElement);
@@ -335,7 +355,7 @@ export class TaskManager {
 
         try {
             const result = await this.sendCreateTask(taskData);
-            this.updateTasksForDate(result.tasks, taskData.date);
+            this.addTaskToDOM(result.task);
             this.filterTasksForWeek(this.weekManager.getCurrentWeekDates());
             document.getElementById('task-modal').style.display = 'none';
             document.getElementById('task-form').reset();
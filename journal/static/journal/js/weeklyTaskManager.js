@@ -143,6 +143,16 @@ export class WeeklyTaskManager {
         return await response.json();
     }
 
+    async sendTaskToggle(taskId) {
+        // Флаг переключает сервер одним UPDATE — без чтения задачи и отправки всех полей
+        const response = await fetch(`/api/tasks/${taskId}/toggle/`, {
+            method: 'POST',
+            headers: this.getRequestHeaders()
+        });
+        if (!response.ok) throw new Error('Weekly task toggle failed');
+        return await response.json();
+    }
+
     prepareDeleteTask(taskId) {
         this.taskToDelete = taskId;
         document.getElementById('weekly-confirm-modal').style.display = 'flex';
@@ -188,8 +198,7 @@ export class WeeklyTaskManager {
 
     async toggleTaskDone(taskId) {
         try {
-            const task = await this.fetchTask(taskId);
-            const updatedTask = await this.sendTaskUpdate({...task, is_done: !task.is_done});
+            const updatedTask = await this.sendTaskToggle(taskId);
             this.updateTaskInDOM(updatedTask);
             this.updateStatistics();
             showNotification('Задача обновлена!', 'success');
@@ -0,0 +1,177 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import ChangeSequence, DailyStats, Task, TaskArchive
+
+
+def _as_date(value):
+    return parse_date(value) if isinstance(value, str) else value
+
+
+def task_state(task, loaded=False):
+    """
+    (date, is_done) задачи для счётчиков или None, если задача в них не входит.
+    loaded=True — состояние, прочитанное из БД (до изменений в памяти).
+    """
+    if loaded:
+        values = getattr(task, '_loaded_values', None)
+        if values is None or not {'date', 'is_done', 'is_weekly'} <= values.keys():
+            return None
+        date, is_done, is_weekly = values['date'], values['is_done'], values['is_weekly']
+    else:
+        date, is_done, is_weekly = task.date, task.is_done, task.is_weekly
+
+    if is_weekly:
+        return None
+    return _as_date(date), bool(is_done)
+
+
+def stats_delta(old, new):
+    """Разница счётчиков по датам между двумя состояниями задачи (task_state)."""
+    totals, dones = Counter(), Counter()
+    if old is not None:
+        totals[old[0]] -= 1
+        dones[old[0]] -= old[1]
+    if new is not None:
+        totals[new[0]] += 1
+        dones[new[0]] += new[1]
+    return {
+        date: (totals[date], dones[date])
+        for date in totals.keys() | dones.keys()
+        if totals[date] or dones[date]
+    }
+
+
+def apply_stats_delta(user_id, deltas):
+    """
+    Применяет {date: (d_total, d_done)} через UPDATE ... SET total = total + ?,
+    чтобы параллельные переключения не теряли инкременты.
+    Вызывается внутри транзакции, изменяющей задачи.
+    """
+    for date, (d_total, d_done) in deltas.items():
+        updated = DailyStats.objects.filter(user_id=user_id, date=date).update(
+            total=F('total') + d_total, done=F('done') + d_done
+        )
+        # Уменьшать нечего: строки нет (например, каскадное удаление пользователя
+        # уже удалило его счётчики) — расхождения исправляет rebuild_daily_stats
+        if updated or (d_total <= 0 and d_done <= 0):
+            continue
+        try:
+            with transaction.atomic():
+                DailyStats.objects.create(
+                    user_id=user_id, date=date, total=max(d_total, 0), done=max(d_done, 0)
+                )
+        except IntegrityError:
+            # Строку успел создать параллельный запрос
+            DailyStats.objects.filter(user_id=user_id, date=date).update(
+                total=F('total') + d_total, done=F('done') + d_done
+            )
+
+
+def apply_bulk_stats_delta(user_id, deltas):
+    """
+    apply_stats_delta для порций по сотням дат (импорт): строки на новые даты
+    создаются одним INSERT, существующие сдвигаются одним executemany вместо
+    отдельного UPDATE через ORM на каждую дату.
+    """
+    existing = set(
+        DailyStats.objects.filter(user_id=user_id, date__in=deltas.keys()).values_list('date', flat=True)
+    )
+    missing = [
+        DailyStats(user_id=user_id, date=date, total=max(d_total, 0), done=max(d_done, 0))
+        for date, (d_total, d_done) in deltas.items()
+        if date not in existing and (d_total > 0 or d_done > 0)
+    ]
+    try:
+        with transaction.atomic():
+            DailyStats.objects.bulk_create(missing)
+    except IntegrityError:
+        # Часть строк успел создать параллельный запрос — по датам по одной
+        apply_stats_delta(user_id, {stats.date: deltas[stats.date] for stats in missing})
+
+    date_field = DailyStats._meta.get_field('date')
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {qn(DailyStats._meta.db_table)} SET total = total + %s, done = done + %s '
+            f'WHERE user_id = %s AND {qn(date_field.column)} = %s',
+            [
+                (d_total, d_done, user_id, date_field.get_db_prep_value(date, connection))
+                for date, (d_total, d_done) in deltas.items() if date in existing
+            ],
+        )
+
+
+def record_task_change(task, old, new):
+    apply_stats_delta(task.user_id, stats_delta(old, new))
+
+
+def get_day_stats(user_id, date):
+    stats = DailyStats.objects.filter(pk=(user_id, _as_date(date))).values('total', 'done').first()
+    return stats or {'total': 0, 'done': 0}
+
+
+async def aget_day_stats(user_id, date):
+    stats = await DailyStats.objects.filter(pk=(user_id, _as_date(date))).values('total', 'done').afirst()
+    return stats or {'total': 0, 'done': 0}
+
+
+def get_week_stats(user_id, start_date):
+    rows = DailyStats.objects.filter(
+        user_id=user_id, date__range=[start_date, start_date + timedelta(days=6)]
+    ).values_list('date', 'total', 'done')
+    return {date: {'total': total, 'done': done} for date, total, done in rows}
+
+
+def get_day_counts(user_id, start_date, end_date):
+    """
+    {date: (total, done)} за период: GROUP BY по задачам — тот же подсчёт,
+    что в rebuild_daily_stats, — плюс такой же по TaskArchive. Выполненные
+    задачи старше JOURNAL_ARCHIVE_AFTER_WEEKS живут только в архиве, и без
+    него прошлые годы показывали бы done=0.
+    """
+    counts = {}
+    for model in (Task, TaskArchive):
+        rows = (
+            model.objects.filter(user_id=user_id, date__range=[start_date, end_date], is_weekly=False)
+            .values('date')
+            # Count по date, а не id: у архива id — не rowid и в индекс не входит
+            .annotate(total=Count('date'), done=Count('date', filter=Q(is_done=True)))
+            .order_by()
+            .values_list('date', 'total', 'done')
+        )
+        for date, total, done in rows:
+            old_total, old_done = counts.get(date, (0, 0))
+            counts[date] = (old_total + total, old_done + done)
+    return counts
+
+
+def bump_change_seq(user_id, count=1):
+    """Увеличивает номер изменений пользователя в текущей транзакции и возвращает новое значение."""
+    # update() не трогает auto_now — время изменения проставляем явно
+    updated = ChangeSequence.objects.filter(user_id=user_id).update(
+        seq=F('seq') + count, updated_at=timezone.now()
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                ChangeSequence.objects.create(user_id=user_id, seq=count)
+                return count
+        except IntegrityError:
+            ChangeSequence.objects.filter(user_id=user_id).update(
+                seq=F('seq') + count, updated_at=timezone.now()
+            )
+    return get_change_seq(user_id)
+
+
+def get_change_seq(user_id):
+    return ChangeSequence.objects.filter(user_id=user_id).values_list('seq', flat=True).first() or 0
+
+
+async def aget_change_seq(user_id):
+    return await ChangeSequence.objects.filter(user_id=user_id).values_list('seq', flat=True).afirst() or 0
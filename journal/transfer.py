@@ -0,0 +1,203 @@
+import csv
+import json
+from collections import Counter
+
+from django.db import connection, transaction
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .cache import invalidate_weeks
+from .events import RESYNC, publish_event
+from .models import Task
+from .stats import apply_bulk_stats_delta, bump_change_seq
+
+EXPORT_FIELDS = ['id', 'title', 'description', 'date', 'is_done', 'is_weekly', 'created_at', 'updated_at']
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 1000
+FORMATS = ('ndjson', 'csv')
+
+
+class TransferError(Exception):
+    pass
+
+
+def export_rows(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """Задачи пользователя кортежами EXPORT_FIELDS, читаются с курсора порциями."""
+    return (
+        Task.objects.filter(user=user)
+        .order_by('id')
+        .values_list(*EXPORT_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+
+
+def _plain(value):
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, map(_plain, row))), ensure_ascii=False) + '\n'
+
+
+class _Echo:
+    # csv.writer пишет в "файл", а мы сразу отдаём строку наружу
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow([_plain(value) for value in row])
+
+
+def export_lines(user, fmt, chunk_size=EXPORT_CHUNK_SIZE):
+    rows = export_rows(user, chunk_size)
+    return csv_lines(rows) if fmt == 'csv' else ndjson_lines(rows)
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes')
+
+
+def parse_records(lines, fmt):
+    """Пары (номер строки, запись) импорта из построчного источника (файл, поток)."""
+    if fmt == 'csv':
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record
+        return
+    for number, line in enumerate(lines, 1):
+        if line.strip():
+            try:
+                yield number, json.loads(line)
+            except json.JSONDecodeError as e:
+                raise TransferError(f'Строка {number}: неверный JSON ({e})')
+
+
+def _task_from_record(user, record):
+    if not isinstance(record, dict):
+        raise TransferError(f'задача должна быть объектом, а не {record!r}')
+    try:
+        # parse_date/parse_datetime бросают ValueError на несуществующих датах вроде 2024-13-01
+        date = parse_date(str(record.get('date') or ''))
+        created_at = parse_datetime(str(record.get('created_at') or ''))
+        updated_at = parse_datetime(str(record.get('updated_at') or ''))
+    except ValueError as e:
+        raise TransferError(f'неверная дата ({e})')
+    if not record.get('title') or date is None:
+        raise TransferError(f'у задачи нет названия или даты: {record}')
+    task = Task(
+        user=user,
+        title=record['title'],
+        description=record.get('description') or '',
+        date=date,
+        is_done=_parse_bool(record.get('is_done', False)),
+        is_weekly=_parse_bool(record.get('is_weekly', False)),
+    )
+    task.sync_week_start()
+    task.imported_created_at = created_at
+    task.imported_updated_at = updated_at
+    return task
+
+
+def _dedupe_key(date, title, created_at):
+    return date, title, created_at.isoformat() if created_at else None
+
+
+def _restore_timestamps(tasks):
+    """
+    Возвращает задачам created_at/updated_at из файла. bulk_update строит CASE
+    на каждую строку и на тысячах задач медленнее самой вставки, поэтому
+    здесь один подготовленный UPDATE через executemany.
+    """
+    if not tasks:
+        return
+    fields = [Task._meta.get_field(name) for name in ('created_at', 'updated_at')]
+    params = [
+        [
+            field.get_db_prep_value(imported or getattr(task, field.attname), connection)
+            for field, imported in zip(fields, (task.imported_created_at, task.imported_updated_at))
+        ] + [task.pk]
+        for task in tasks
+    ]
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'UPDATE {qn(Task._meta.db_table)} SET {qn(fields[0].column)} = %s, '
+            f'{qn(fields[1].column)} = %s WHERE {qn(Task._meta.pk.column)} = %s',
+            params,
+        )
+
+
+def import_batch(user, tasks, dedupe=True):
+    """
+    Записывает порцию задач одной транзакцией: bulk_create, затем восстановление
+    created_at/updated_at из файла (auto_now_add их перезаписывает), счётчики
+    DailyStats и кэш недель. При dedupe пропускает задачи, уже лежащие в базе
+    с той же датой, названием и временем создания (без created_at в файле —
+    с той же датой и названием). Возвращает число созданных.
+    """
+    with transaction.atomic():
+        if dedupe:
+            existing = set()
+            # Фильтр и по названиям: в Python приходят только возможные дубли,
+            # а не все задачи затронутых дней
+            for date, title, created_at in Task.objects.filter(
+                user=user, date__in={t.date for t in tasks}, title__in={t.title for t in tasks}
+            ).values_list('date', 'title', 'created_at'):
+                existing.add(_dedupe_key(date, title, created_at))
+                existing.add(_dedupe_key(date, title, None))
+            fresh = []
+            for task in tasks:
+                key = _dedupe_key(task.date, task.title, task.imported_created_at)
+                if key not in existing:
+                    existing.add(key)
+                    fresh.append(task)
+            tasks = fresh
+        if not tasks:
+            return 0
+
+        Task.objects.bulk_create(tasks)
+
+        _restore_timestamps([t for t in tasks if t.imported_created_at or t.imported_updated_at])
+
+        totals, dones = Counter(), Counter()
+        for task in tasks:
+            if not task.is_weekly:
+                totals[task.date] += 1
+                dones[task.date] += task.is_done
+        apply_bulk_stats_delta(user.pk, {date: (totals[date], dones[date]) for date in totals})
+        # Порция — сотни задач: вместо события на каждую клиент перечитает неделю
+        publish_event(user.pk, RESYNC, seq=bump_change_seq(user.pk, len(tasks)))
+        invalidate_weeks(
+            user.pk,
+            dates={t.date for t in tasks if not t.is_weekly},
+            weekly_dates={t.date for t in tasks if t.is_weekly},
+        )
+
+    return len(tasks)
+
+
+def import_records(user, records, batch_size=IMPORT_BATCH_SIZE, dedupe=True):
+    """
+    Импортирует пары (номер строки, запись) из parse_records порциями по batch_size,
+    каждая — своя транзакция. Возвращает (прочитано, создано).
+    """
+    read = created = 0
+    batch = []
+    for number, record in records:
+        try:
+            batch.append(_task_from_record(user, record))
+        except TransferError as e:
+            raise TransferError(f'Строка {number}: {e}')
+        read += 1
+        if len(batch) >= batch_size:
+            created += import_batch(user, batch, dedupe)
+            batch = []
+    if batch:
+        created += import_batch(user, batch, dedupe)
+    return read, created
@@ -1,15 +1,54 @@
-from django.urls import path
+from django.conf import settings
+from django.urls import path, register_converter
 
-from . import views
+from . import async_views, views
+from .converters import OccurrenceIdConverter
 from .views import WeekView
 
+register_converter(OccurrenceIdConverter, 'occurrence')
+
+
+def task_api_patterns(task_views):
+    """CRUD задач и данные недели; task_views — journal.views или journal.async_views."""
+    return [
+        path('api/tasks/create/', task_views.create_task, name='create_task'),
+        path('api/tasks/week/', task_views.get_week_tasks, name='get_week_tasks'),
+        path('api/tasks/<int:task_id>/', task_views.get_task, name='get_task'),
+        path('api/tasks/<int:task_id>/update/', task_views.update_task, name='update_task'),
+        path('api/tasks/<int:task_id>/toggle/', task_views.toggle_task_view, name='toggle_task'),
+        path('api/tasks/<int:task_id>/delete/', task_views.delete_task, name='delete_task'),
+    ]
+
+
 urlpatterns = [
     path('', WeekView.as_view(), name='week'),
 
-    path('api/tasks/create/', views.create_task, name='create_task'),
-    path('api/tasks/<int:task_id>/', views.get_task, name='get_task'),
-    path('api/tasks/<int:task_id>/update/', views.update_task, name='update_task'),
-    path('api/tasks/<int:task_id>/delete/', views.delete_task, name='delete_task'),
+    # С JOURNAL_ASYNC_VIEWS под ASGI — async-версии этих view
+    *task_api_patterns(async_views if getattr(settings, 'JOURNAL_ASYNC_VIEWS', False) else views),
+    path('api/tasks/', views.list_tasks_view, name='list_tasks'),
+    path('api/tasks/batch/', views.batch_tasks, name='batch_tasks'),
+    path('api/tasks/history/', views.task_history, name='task_history'),
+    path('api/tasks/heatmap/', views.task_heatmap, name='task_heatmap'),
+    path('api/tasks/search/', views.search_tasks_view, name='search_tasks'),
+    path('api/tasks/export/', views.export_tasks, name='export_tasks'),
+    path('api/tasks/events/', async_views.task_events, name='task_events'),
+    path('api/tasks/weekly/carry-over/', views.carry_over_weekly, name='carry_over_weekly'),
+    path('api/cache/stats/', views.week_cache_stats_view, name='week_cache_stats'),
+    path('metrics', views.metrics, name='metrics'),
+    path('api/calendar/', views.calendar_feed_token, name='calendar_feed_token'),
+    path('api/calendar/reset/', views.reset_calendar_feed_token, name='reset_calendar_feed_token'),
+    path('calendar/<str:token>.ics', views.calendar_feed, name='calendar_feed'),
+
+    # Вхождения повторяющихся задач адресуются так же, как обычные задачи
+    path('api/tasks/<occurrence:occurrence_id>/', views.get_occurrence, name='get_occurrence'),
+    path('api/tasks/<occurrence:occurrence_id>/update/', views.update_occurrence, name='update_occurrence'),
+    path('api/tasks/<occurrence:occurrence_id>/toggle/', views.toggle_occurrence, name='toggle_occurrence'),
+    path('api/tasks/<occurrence:occurrence_id>/delete/', views.delete_occurrence, name='delete_occurrence'),
+
+    path('api/recurring/', views.recurring_tasks, name='recurring_tasks'),
+    path('api/recurring/create/', views.create_recurring_task, name='create_recurring_task'),
+    path('api/recurring/<int:rule_id>/update/', views.update_recurring_task, name='update_recurring_task'),
+    path('api/recurring/<int:rule_id>/delete/', views.delete_recurring_task, name='delete_recurring_task'),
 ]
 
 
@@ -28,9 +67,4 @@ urlpatterns = [
     path('api/tasks/weekly/<int:task_id>/update/', views.update_weekly_task, name='update_weekly_task'),
     path('api/tasks/weekly/<int:task_id>/delete/', views.delete_weekly_task, name='delete_weekly_task'),
 
-    path('api/tasks/create/', views.create_task, name='create_task'),
-    path('api/tasks/week/', views.get_week_tasks, name='get_week_tasks'),
-    path('api/tasks/<int:task_id>/', views.get_task, name='get_task'),
-    path('api/tasks/<int:task_id>/update/', views.update_task, name='update_task'),
-    path('api/tasks/<int:task_id>/delete/', views.delete_task, name='delete_task'),
     """
@@ -1,21 +1,38 @@
 import json
 import logging
-from datetime import timedelta
 
+from django.conf import settings
 from django.contrib.auth import login
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView, LogoutView
-from django.http import JsonResponse
+from django.db import transaction
+from django.db.models import Q
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import redirect
-from django.urls import reverse_lazy
-from django.utils import timezone
+from django.urls import reverse, reverse_lazy
+from django.utils.crypto import constant_time_compare
+from django.utils.dateparse import parse_date
+from django.views.decorators.cache import cache_control
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import condition, require_GET, require_POST
 from django.views.generic import CreateView
 from django.views.generic import TemplateView
 
+from .cache import week_cache_stats
+from .feeds import FEED_KINDS, feed_lines, feed_state, issue_feed_token
 from .forms import CustomRegisterForm
-from .models import Task
+from .models import RecurrenceException, RecurringTask, Task, TaskArchive
+from .profiling import metrics_registry
+from .recurrence import Occurrence, parse_occurrence_id, rule_from_data, serialize_rule
+from .search import SEARCH_PAGE_SIZE, SearchError, search_tasks
+from .serializers import FastJsonResponse, parse_fields, serialize_task, serialize_week, task_rows
+from .services import (
+    TASK_LIST_PAGE_SIZE, BatchError, TaskConflict, apply_task_batch, carry_over_weekly_tasks, fragment_cache_context,
+    get_heatmap, get_week, get_week_range, list_tasks, parse_if_match, parse_task_cursor, task_etag, toggle_task,
+    update_task_fields, week_etag
+)
+from .stats import get_day_stats
+from .transfer import FORMATS, export_lines
 
 logger = logging.getLogger(__name__)
 
@@ -55,47 +72,46 @@ class WeekView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        today = timezone.now().date()
-        start_date = today - timedelta(days=today.weekday())
+        start_date, _ = get_week_range()
+        context.update(get_week(self.request.user, start_date))
+        context.update(fragment_cache_context())
 
-        days = []
-        day_names = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
+        # Строка собирается, только если DEBUG включён; repr всего контекста
+        # не пишем — он вычислял бы QuerySet'ы
+        logger.debug('Неделя %s пользователя %s: %s баллов',
+                     context['week_start'], self.request.user.pk, context['total_points'])
+        return context
 
-        for i in range(7):
-            date = start_date + timedelta(days=i)
-            day_tasks = Task.objects.filter(
-                user=self.request.user,
-                date=date,
-                is_weekly=False
-            )
 
-            days.append({
-                'date': date,
-                'day_name': day_names[i],
-                'today': date == today,
-                'tasks': day_tasks,
-                'earned_points': day_tasks.filter(is_done=True).count()
-            })
-
-        # Get weekly tasks for current week
-        weekly_tasks = Task.objects.filter(
-            user=self.request.user,
-            is_weekly=True
-        )
+def _week_offset_etag(request):
+    if not request.user.is_authenticated:
+        return None
+    try:
+        start_date, _ = get_week_range(int(request.GET.get('week_offset', 0)))
+    except (ValueError, OverflowError):
+        # Нечисловой или огромный week_offset — ответ 400 отдаст сама view
+        return None
+    # Неделя уже собрана для ETag — view переиспользует её, а не собирает заново
+    request.journal_week = get_week(request.user, start_date)
+    return week_etag(request.user, request.journal_week)
+
+
+@require_GET
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_week_offset_etag)
+def get_week_tasks(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
 
-        context['days'] = days
-        context['weekly_tasks'] = weekly_tasks
-        context['week_start'] = start_date
-        context['week_end'] = start_date + timedelta(days=6)
-        context['week_number'] = start_date.isocalendar()[1]
-        context['total_points'] = Task.objects.filter(
-            user=self.request.user,
-            date__range=[start_date, start_date + timedelta(days=6)],
-            is_done=True
-        ).count()
-
-        logger.debug(f"Context for week page:\n{context}")
-        return context
+    try:
+        week = getattr(request, 'journal_week', None)
+        if week is None:
+            start_date, _ = get_week_range(int(request.GET.get('week_offset', 0)))
+            week = get_week(request.user, start_date)
+        return FastJsonResponse(serialize_week(week, parse_fields(request.GET.get('fields'))))
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
 
 @csrf_exempt
@@ -113,32 +129,35 @@ def create_task(request):
         if not data.get('date'):
             return JsonResponse({'error': 'Дата задачи обязательна'}, status=400)
 
+        date = parse_date(str(data['date']))
+        if date is None:
+            return JsonResponse({'error': 'Неверный формат даты'}, status=400)
+
         task = Task.objects.create(
             user=request.user,
             title=data['title'],
             description=data.get('description', ''),
-            date=data['date'],
+            date=date,
             is_done=data.get('is_done', False),
             is_weekly=data.get('is_weekly', False),
             # TODO это надо присылать с фронтенда, сейчас это не присылается
         )
 
-        # TODO так же если задача недельная, то получить возможно надо недельные задачи
-        # Получаем все задачи на эту дату
-        tasks = Task.objects.filter(date=data['date'], user=request.user)
-        tasks_data = [{
-            'id': t.id,
-            'title': t.title,
-            'description': t.description,
-            'date': t.date.isoformat(),
-            'is_done': t.is_done,
-            'is_weekly': t.is_weekly
-        } for t in tasks]
+        # По умолчанию возвращаем только созданную задачу и номер изменений:
+        # клиент дополняет своё состояние сам, без перечитывания всего дня
+        response = {
+            'task': serialize_task(task),
+            'new_task_id': task.id,
+            'change_seq': task.change_seq,
+            'day_stats': get_day_stats(request.user.pk, task.date),
+        }
 
-        return JsonResponse({
-            'tasks': tasks_data,
-            'new_task_id': task.id
-        }, status=201)
+        # Старые клиенты получают весь день по ?include=day
+        if request.GET.get('include') == 'day':
+            tasks = Task.objects.filter(date=task.date, user=request.user)
+            response['tasks'] = task_rows(tasks, parse_fields(request.GET.get('fields')))
+
+        return FastJsonResponse(response, status=201)
 
     except json.JSONDecodeError:
         return JsonResponse({'error': 'Неверный JSON'}, status=400)
@@ -146,21 +165,31 @@ def create_task(request):
         return JsonResponse({'error': str(e)}, status=400)
 
 
+def _task_written_response(request, task):
+    return JsonResponse({
+        **serialize_task(task),
+        'day_stats': get_day_stats(request.user.pk, task.date),
+        'change_seq': task.change_seq
+    }, headers={'ETag': task_etag(task)})
+
+
+def _task_conflict_response(conflict):
+    # Текущее состояние задачи — чтобы клиент мог показать его и повторить правку
+    return JsonResponse(
+        {'error': str(conflict), 'task': serialize_task(conflict.task)},
+        status=409, headers={'ETag': task_etag(conflict.task)}
+    )
+
+
 @csrf_exempt
 def get_task(request, task_id):
     if not request.user.is_authenticated:
         return JsonResponse({'error': 'Требуется авторизация'}, status=401)
 
     try:
+        fields = parse_fields(request.GET.get('fields'))
         task = Task.objects.get(id=task_id, user=request.user)
-        return JsonResponse({
-            'id': task.id,
-            'title': task.title,
-            'description': task.description,
-            'date': task.date.isoformat(),
-            'is_done': task.is_done,
-            'is_weekly': task.is_weekly
-        })
+        return JsonResponse(serialize_task(task, fields), headers={'ETag': task_etag(task)})
     except Task.DoesNotExist:
         return JsonResponse({'error': 'Задача не найдена'}, status=404)
     except Exception as e:
@@ -174,26 +203,32 @@ def update_task(request, task_id):
         return JsonResponse({'error': 'Требуется авторизация'}, status=401)
 
     try:
-        task = Task.objects.get(id=task_id, user=request.user)
         data = json.loads(request.body)
+        task = update_task_fields(request.user, task_id, data, parse_if_match(request.headers.get('If-Match')))
+        return _task_written_response(request, task)
 
-        task.title = data.get('title', task.title)
-        task.description = data.get('description', task.description)
-        task.is_done = data.get('is_done', task.is_done)
-        task.is_weekly = data.get('is_weekly', task.is_weekly)
-        task.save()
+    except Task.DoesNotExist:
+        return JsonResponse({'error': 'Задача не найдена'}, status=404)
+    except TaskConflict as e:
+        return _task_conflict_response(e)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
-        return JsonResponse({
-            'id': task.id,
-            'title': task.title,
-            'description': task.description,
-            'date': task.date.isoformat(),
-            'is_done': task.is_done,
-            'is_weekly': task.is_weekly
-        })
+
+@csrf_exempt
+@require_POST
+def toggle_task_view(request, task_id):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        task = toggle_task(request.user, task_id, parse_if_match(request.headers.get('If-Match')))
+        return _task_written_response(request, task)
 
     except Task.DoesNotExist:
         return JsonResponse({'error': 'Задача не найдена'}, status=404)
+    except TaskConflict as e:
+        return _task_conflict_response(e)
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
@@ -207,7 +242,11 @@ def delete_task(request, task_id):
     try:
         task = Task.objects.get(id=task_id, user=request.user)
         task.delete()
-        return JsonResponse({'status': 'deleted'})
+        return JsonResponse({
+            'status': 'deleted',
+            'day_stats': get_day_stats(request.user.pk, task.date),
+            'change_seq': task.change_seq
+        })
 
     except Task.DoesNotExist:
         return JsonResponse({'error': 'Задача не найдена'}, status=404)
@@ -215,6 +254,466 @@ def delete_task(request, task_id):
         return JsonResponse({'error': str(e)}, status=400)
 
 
+@csrf_exempt
+@require_POST
+def carry_over_weekly(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        data = json.loads(request.body or '{}')
+        start_date, _ = get_week_range(int(data.get('week_offset', 0)))
+        tasks = carry_over_weekly_tasks(request.user, start_date)
+        return JsonResponse({'tasks': [serialize_task(t) for t in tasks]}, status=201)
+
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Неверный JSON'}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+def _query_date(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    try:
+        # Несуществующую дату вроде 2024-13-01 parse_date не пропускает, а бросает ValueError
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValueError('Неверный формат даты')
+    return parsed
+
+
+def _query_flag(request, name):
+    value = request.GET.get(name)
+    if not value:
+        return None
+    if value in ('1', 'true'):
+        return True
+    if value in ('0', 'false'):
+        return False
+    raise ValueError(f'{name} должен быть 1/0 или true/false')
+
+
+@require_GET
+def list_tasks_view(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        cursor = request.GET.get('cursor')
+        tasks, next_cursor = list_tasks(
+            request.user,
+            date_from=_query_date(request, 'from'),
+            date_to=_query_date(request, 'to'),
+            is_done=_query_flag(request, 'done'),
+            is_weekly=_query_flag(request, 'weekly'),
+            cursor=parse_task_cursor(cursor) if cursor else None,
+            limit=int(request.GET.get('limit', TASK_LIST_PAGE_SIZE)),
+            fields=parse_fields(request.GET.get('fields')),
+        )
+        return FastJsonResponse({'tasks': tasks, 'next_cursor': next_cursor})
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@require_GET
+def task_heatmap(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        return FastJsonResponse(get_heatmap(request.user, request.GET.get('year'), request.GET.get('month')))
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+HISTORY_PAGE_SIZE = 100
+
+
+def _parse_history_cursor(value):
+    try:
+        cursor_date, cursor_id = value.split(':')
+        cursor_date = parse_date(cursor_date)
+        cursor_id = int(cursor_id)
+    except ValueError:
+        cursor_date = None
+    if cursor_date is None:
+        raise ValueError('Неверный курсор')
+    return cursor_date, cursor_id
+
+
+@require_GET
+def task_history(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        archived = TaskArchive.objects.filter(user=request.user)
+        date_from = _query_date(request, 'from')
+        date_to = _query_date(request, 'to')
+        if date_from is not None:
+            archived = archived.filter(date__gte=date_from)
+        if date_to is not None:
+            archived = archived.filter(date__lte=date_to)
+
+        # Курсор "дата:id" последней выданной записи, страницы идут от новых к старым
+        cursor = request.GET.get('cursor')
+        if cursor:
+            cursor_date, cursor_id = _parse_history_cursor(cursor)
+            archived = archived.filter(
+                Q(date__lt=cursor_date) | Q(date=cursor_date, id__lt=cursor_id)
+            )
+
+        limit = min(int(request.GET.get('limit', HISTORY_PAGE_SIZE)), HISTORY_PAGE_SIZE)
+        # Курсор строится из date и id, поэтому они выбираются при любом ?fields=
+        fields = parse_fields(request.GET.get('fields'))
+        if fields is not None:
+            fields = (*fields, 'date')
+        page = task_rows(archived.order_by('-date', '-id')[:limit + 1], fields)
+        next_cursor = None
+        if len(page) > limit:
+            page = page[:limit]
+            next_cursor = f"{page[-1]['date']}:{page[-1]['id']}"
+
+        return FastJsonResponse({
+            'tasks': page,
+            'next_cursor': next_cursor,
+        })
+
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@require_GET
+def search_tasks_view(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        # Курсор "rank:id" последней выданной записи
+        cursor = request.GET.get('cursor')
+        if cursor:
+            cursor_rank, cursor_id = cursor.rsplit(':', 1)
+            cursor = (float(cursor_rank), int(cursor_id))
+
+        limit = min(int(request.GET.get('limit', SEARCH_PAGE_SIZE)), SEARCH_PAGE_SIZE)
+        results, next_cursor = search_tasks(request.user, request.GET.get('q', ''), cursor, limit)
+
+        return JsonResponse({
+            'tasks': results,
+            'next_cursor': f'{next_cursor[0]!r}:{next_cursor[1]}' if next_cursor else None,
+        })
+
+    except SearchError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+EXPORT_CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+@require_GET
+def export_tasks(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    fmt = request.GET.get('format', 'ndjson')
+    if fmt not in FORMATS:
+        return JsonResponse({'error': 'Формат должен быть ndjson или csv'}, status=400)
+
+    # Строки читаются курсором и уходят клиенту по мере чтения
+    response = StreamingHttpResponse(
+        export_lines(request.user, fmt),
+        content_type=f'{EXPORT_CONTENT_TYPES[fmt]}; charset=utf-8',
+    )
+    response['Content-Disposition'] = f'attachment; filename="tasks-{request.user.username}.{fmt}"'
+    return response
+
+
+def _calendar_feed_state(request, token):
+    # Проверка токена и версия ленты — один запрос; request.user и сессию
+    # не трогаем, чтобы опрос календарём ничего не писал в django_session
+    if not hasattr(request, 'calendar_feed'):
+        request.calendar_feed = feed_state(token)
+    return request.calendar_feed
+
+
+def _calendar_feed_etag(request, token):
+    state = _calendar_feed_state(request, token)
+    if state is None:
+        return None
+    # Начало окна: лента меняется с датой, даже если задачи не правились
+    return f"{state['user_id']}-{state['seq']}-{state['window_start'] or 'all'}-{request.GET.get('kind', 'event')}"
+
+
+def _calendar_feed_last_modified(request, token):
+    state = _calendar_feed_state(request, token)
+    return state['updated_at'] if state else None
+
+
+@require_GET
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_calendar_feed_etag, last_modified_func=_calendar_feed_last_modified)
+def calendar_feed(request, token):
+    state = _calendar_feed_state(request, token)
+    if state is None:
+        return JsonResponse({'error': 'Лента не найдена'}, status=404)
+
+    kind = request.GET.get('kind', 'event')
+    if kind not in FEED_KINDS:
+        return JsonResponse({'error': 'kind должен быть event или todo'}, status=400)
+
+    response = StreamingHttpResponse(
+        feed_lines(state['user_id'], request.get_host(), kind),
+        content_type='text/calendar; charset=utf-8',
+    )
+    response['Content-Disposition'] = 'inline; filename="tasks.ics"'
+    return response
+
+
+def _calendar_feed_url(request, token):
+    return request.build_absolute_uri(reverse('calendar_feed', args=[token]))
+
+
+@require_GET
+def calendar_feed_token(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    return JsonResponse({'url': _calendar_feed_url(request, issue_feed_token(request.user))})
+
+
+@csrf_exempt
+@require_POST
+def reset_calendar_feed_token(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    return JsonResponse({'url': _calendar_feed_url(request, issue_feed_token(request.user, reset=True))})
+
+
+@csrf_exempt
+@require_POST
+def batch_tasks(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            return JsonResponse({'error': 'Тело запроса должно быть объектом'}, status=400)
+        results, change_seq = apply_task_batch(request.user, data.get('operations'))
+        return JsonResponse({'results': results, 'change_seq': change_seq})
+
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Неверный JSON'}, status=400)
+    except BatchError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@require_GET
+def week_cache_stats_view(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+    if not request.user.is_staff:
+        return JsonResponse({'error': 'Недостаточно прав'}, status=403)
+
+    return JsonResponse(week_cache_stats.as_dict())
+
+
+@require_GET
+def metrics(request):
+    # Сборщик метрик ходит с токеном из JOURNAL_METRICS_TOKEN, люди — под staff
+    token = getattr(settings, 'JOURNAL_METRICS_TOKEN', None)
+    if not (token and constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}')):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+        if not request.user.is_staff:
+            return JsonResponse({'error': 'Недостаточно прав'}, status=403)
+
+    return HttpResponse(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _get_occurrence(user, occurrence_id):
+    rule_id, date = parse_occurrence_id(occurrence_id)
+    rule = RecurringTask.objects.filter(id=rule_id, user=user).first() if date else None
+    if rule is None or not rule.occurs_on(date):
+        raise RecurringTask.DoesNotExist
+    exception = RecurrenceException.objects.filter(rule=rule, date=date).first()
+    if exception is not None and exception.is_skipped:
+        raise RecurringTask.DoesNotExist
+    return rule, date, exception
+
+
+@csrf_exempt
+def get_occurrence(request, occurrence_id):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        rule, date, exception = _get_occurrence(request.user, occurrence_id)
+        return JsonResponse(serialize_task(Occurrence(rule, date, exception)))
+    except RecurringTask.DoesNotExist:
+        return JsonResponse({'error': 'Задача не найдена'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@csrf_exempt
+@require_POST
+def update_occurrence(request, occurrence_id):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        rule, date, exception = _get_occurrence(request.user, occurrence_id)
+        data = json.loads(request.body)
+
+        # Правка одного вхождения сохраняется исключением, само правило не меняется
+        if exception is None:
+            exception = RecurrenceException(rule=rule, user=request.user, date=date)
+        exception.is_done = data.get('is_done', exception.is_done)
+        if 'title' in data:
+            exception.title = data['title'] if data['title'] != rule.title else None
+        if 'description' in data:
+            exception.description = data['description'] if data['description'] != rule.description else None
+        exception.save()
+
+        response = serialize_task(Occurrence(rule, date, exception))
+        response['change_seq'] = exception.change_seq
+        return JsonResponse(response)
+
+    except RecurringTask.DoesNotExist:
+        return JsonResponse({'error': 'Задача не найдена'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@csrf_exempt
+@require_POST
+def toggle_occurrence(request, occurrence_id):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        # Чтение и запись исключения в одной транзакции: параллельные
+        # переключения одного вхождения не теряются
+        with transaction.atomic():
+            rule, date, exception = _get_occurrence(request.user, occurrence_id)
+            is_done = Occurrence(rule, date, exception).is_done
+            if exception is None:
+                exception = RecurrenceException(rule=rule, user=request.user, date=date)
+            exception.is_done = not is_done
+            exception.save()
+
+        response = serialize_task(Occurrence(rule, date, exception))
+        response['change_seq'] = exception.change_seq
+        return JsonResponse(response)
+
+    except RecurringTask.DoesNotExist:
+        return JsonResponse({'error': 'Задача не найдена'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@csrf_exempt
+@require_POST
+def delete_occurrence(request, occurrence_id):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        rule, date, exception = _get_occurrence(request.user, occurrence_id)
+        if exception is None:
+            exception = RecurrenceException(rule=rule, user=request.user, date=date)
+        exception.is_skipped = True
+        exception.save()
+        return JsonResponse({'status': 'deleted', 'change_seq': exception.change_seq})
+
+    except RecurringTask.DoesNotExist:
+        return JsonResponse({'error': 'Задача не найдена'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@csrf_exempt
+def recurring_tasks(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    rules = RecurringTask.objects.filter(user=request.user)
+    return JsonResponse({'recurring_tasks': [serialize_rule(rule) for rule in rules]})
+
+
+@csrf_exempt
+@require_POST
+def create_recurring_task(request):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        data = json.loads(request.body)
+        rule = RecurringTask(user=request.user, frequency=RecurringTask.DAILY)
+        error = rule_from_data(rule, data)
+        if error:
+            return JsonResponse({'error': error}, status=400)
+        rule.save()
+        return JsonResponse(serialize_rule(rule), status=201)
+
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Неверный JSON'}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@csrf_exempt
+@require_POST
+def update_recurring_task(request, rule_id):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        rule = RecurringTask.objects.get(id=rule_id, user=request.user)
+        data = json.loads(request.body)
+        error = rule_from_data(rule, data)
+        if error:
+            return JsonResponse({'error': error}, status=400)
+        rule.save()
+        return JsonResponse(serialize_rule(rule))
+
+    except RecurringTask.DoesNotExist:
+        return JsonResponse({'error': 'Задача не найдена'}, status=404)
+    except json.JSONDecodeError:
+        return JsonResponse({'error': 'Неверный JSON'}, status=400)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+@csrf_exempt
+@require_POST
+def delete_recurring_task(request, rule_id):
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Требуется авторизация'}, status=401)
+
+    try:
+        rule = RecurringTask.objects.get(id=rule_id, user=request.user)
+        rule.delete()
+        return JsonResponse({'status': 'deleted'})
+
+    except RecurringTask.DoesNotExist:
+        return JsonResponse({'error': 'Задача не найдена'}, status=404)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+
 """
 # Helper function to get week range
 def get_week_range(week_offset=0):